@@ -0,0 +1,120 @@
+"""
+Measures end-to-end client overhead against a local mock Fibrous API
+(`fibrous_python.mock_server`), without touching the real API: sequential
+quote latency percentiles of the sync and async routers, and batch quote
+throughput at several concurrency levels. Run it against an installed
+checkout (`pip install -e .`):
+
+    python benchmarks/client.py --latency 0.02 --quotes 200 --concurrency 1 8 32
+
+The mock server shares the interpreter, and its GIL, with the client. For
+throughput numbers at high concurrency run it in another process and point
+the benchmark at it:
+
+    python -m fibrous_python.mock_server --port 8080 --latency 0.02
+    python benchmarks/client.py --url http://127.0.0.1:8080 --latency 0.02
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+from fibrous_python import AsyncFibrousRouter, FibrousRouter
+from fibrous_python.mock_server import MockFibrousAPI
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "mean": statistics.fmean(samples)}
+
+
+def quote_requests(tokens, count: int):
+    # distinct pairs and amounts, so neither caches nor single flight hide requests
+    addresses = [token["address"] for token in tokens]
+    return [(10 ** 18 + i, addresses[i % len(addresses)], addresses[(i + 1) % len(addresses)], "starknet")
+            for i in range(count)]
+
+
+def sync_latency(api: MockFibrousAPI, quotes, parse):
+    samples = []
+    with FibrousRouter(api.url, graph_url=api.url) as router:
+        router.get_best_route(*quotes[0], parse=parse)
+        for quote in quotes:
+            started = time.perf_counter()
+            router.get_best_route(*quote, parse=parse)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def async_latency(api: MockFibrousAPI, quotes, parse):
+    samples = []
+    async with AsyncFibrousRouter(api.url, graph_url=api.url) as router:
+        await router.get_best_route(*quotes[0], parse=parse)
+        for quote in quotes:
+            started = time.perf_counter()
+            await router.get_best_route(*quote, parse=parse)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def sync_throughput(api: MockFibrousAPI, quotes, concurrency: int):
+    with FibrousRouter(api.url, graph_url=api.url, pool_maxsize=concurrency) as router:
+        started = time.perf_counter()
+        errors = sum(result.error is not None
+                     for result in router.get_best_routes(quotes, max_concurrency=concurrency))
+        return len(quotes) / (time.perf_counter() - started), errors
+
+
+async def async_throughput(api: MockFibrousAPI, quotes, concurrency: int):
+    async with AsyncFibrousRouter(api.url, graph_url=api.url,
+                                  pool_maxsize=concurrency) as router:
+        started = time.perf_counter()
+        errors = 0
+        async for result in router.get_best_routes(quotes, max_concurrency=concurrency):
+            errors += result.error is not None
+        return len(quotes) / (time.perf_counter() - started), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=None, help="external mock server, started in process by default")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mean exponential extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quotes", type=int, default=200, help="quotes per measurement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--parse", choices=["strict", "fast"], default=None,
+                        help="typed route parsing, raw dicts by default")
+    args = parser.parse_args()
+
+    if args.url is not None:
+        server = nullcontext(SimpleNamespace(url=args.url.rstrip("/")))
+    else:
+        server = MockFibrousAPI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    with server as api:
+        with FibrousRouter(api.url, graph_url=api.url) as router:
+            tokens = list(router.supported_tokens("starknet").values())
+        quotes = quote_requests(tokens, args.quotes)
+
+        print(f"server latency {args.latency * 1000:.1f}ms, jitter {args.jitter * 1000:.1f}ms, "
+              f"{args.quotes} quotes, parse={args.parse}")
+        print(f"{'client':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'mean':>9} {'overhead':>9}")
+        for name, samples in (("sync", sync_latency(api, quotes, args.parse)),
+                              ("async", asyncio.run(async_latency(api, quotes, args.parse)))):
+            stats = percentiles(samples)
+            print(f"{name:>8} " + " ".join(f"{stats[key] * 1000:>7.2f}ms" for key in ("p50", "p90", "p99", "mean"))
+                  + f" {(stats['p50'] - args.latency) * 1000:>7.2f}ms")
+
+        print()
+        print(f"{'concurrency':>11} {'sync':>12} {'async':>12} {'errors':>7}")
+        for concurrency in args.concurrency:
+            sync_rate, sync_errors = sync_throughput(api, quotes, concurrency)
+            async_rate, async_errors = asyncio.run(async_throughput(api, quotes, concurrency))
+            print(f"{concurrency:>11} {sync_rate:>8.0f} q/s {async_rate:>8.0f} q/s {sync_errors + async_errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
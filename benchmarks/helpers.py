@@ -0,0 +1,60 @@
+"""
+Measures the pure-Python helpers on the quote path, on fixture payloads of
+the mock Fibrous API: per-quote `calculate_slippage` against
+`calculate_slippage_batch`, and token lookups through a TokenIndex against
+scanning the /tokens list. Run it against an installed checkout
+(`pip install -e .`):
+
+    python benchmarks/helpers.py --quotes 1000 --tokens 3000
+"""
+import argparse
+import random
+import timeit
+
+from fibrous_python.mock_server import make_route, make_token
+from fibrous_python.utils import TokenIndex, calculate_slippage, calculate_slippage_batch, parse_route
+
+
+def bench(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=1000, help="quotes per slippage batch")
+    parser.add_argument("--tokens", type=int, default=3000, help="entries in the /tokens list")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    quotes = [make_route(rng, splits=1, hops=1) for _ in range(args.quotes)]
+    routes = [parse_route(quote) for quote in quotes]
+
+    print(f"slippage of {args.quotes} quotes")
+    single = bench(lambda: [calculate_slippage(route) for route in routes], 20)
+    print(f"  {'calculate_slippage':<26} {single * 1e3:>8.2f} ms")
+    try:
+        for name, batch in (("batch, typed routes", routes), ("batch, response dicts", quotes)):
+            elapsed = bench(lambda: calculate_slippage_batch(batch), 20)
+            print(f"  {name:<26} {elapsed * 1e3:>8.2f} ms {single / elapsed:>6.1f}x")
+        exact = bench(lambda: calculate_slippage_batch(quotes, exact=True), 5)
+        print(f"  {'batch, exact':<26} {exact * 1e3:>8.2f} ms {single / exact:>6.1f}x")
+    except ImportError:
+        print("  batch: numpy not installed, skipped")
+
+    tokens = [make_token(rng, i) for i in range(args.tokens)]
+    lookups = [rng.choice(tokens) for _ in range(1000)]
+    print(f"\nlookups of 1000 tokens in a list of {args.tokens}")
+    build = bench(lambda: TokenIndex.from_tokens("starknet", tokens), 20)
+    print(f"  {'TokenIndex.from_tokens':<26} {build * 1e3:>8.2f} ms")
+    index = TokenIndex.from_tokens("starknet", tokens)
+    scan = bench(lambda: [next(t for t in tokens if int(t["address"], 16) == int(token["address"], 16))
+                          for token in lookups], 1)
+    print(f"  {'list scan':<26} {scan * 1e3:>8.2f} ms")
+    by_address = bench(lambda: [index.by_address(token["address"], "starknet") for token in lookups], 20)
+    print(f"  {'by_address':<26} {by_address * 1e3:>8.2f} ms {scan / by_address:>6.0f}x")
+    by_symbol = bench(lambda: [index.by_symbol(token["symbol"], "starknet") for token in lookups], 20)
+    print(f"  {'by_symbol':<26} {by_symbol * 1e3:>8.2f} ms {scan / by_symbol:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures `import fibrous_python` cold-start time and checks that no chain
+library is loaded by it. Exits non-zero on regression, so it can run in CI:
+
+    python benchmarks/import_time.py --max-ms 400
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+# modules that must only be imported when a chain specific helper is used
+FORBIDDEN_MODULES = [
+    "web3",
+    "eth_abi",
+    "starknet_py",
+    "httpx",
+    "fibrous_python.models.erc20ABI",
+    "fibrous_python.models.fibrousRouterABI",
+    "fibrous_python.utils.approve_helper",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import fibrous_python
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "modules": sorted(sys.modules)}))
+"""
+
+
+def measure(runs: int):
+    timings = []
+    modules = set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], check=True,
+                             capture_output=True, text=True).stdout
+        result = json.loads(out)
+        timings.append(result["ms"])
+        modules.update(result["modules"])
+    return timings, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    timings, modules = measure(args.runs)
+    median = statistics.median(timings)
+    print(f"import fibrous_python: median {median:.1f} ms, "
+          f"min {min(timings):.1f} ms, max {max(timings):.1f} ms ({args.runs} runs)")
+
+    failed = False
+    loaded = [m for m in FORBIDDEN_MODULES if m in modules]
+    if loaded:
+        print(f"FAIL: eagerly imported {', '.join(loaded)}")
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: median import time above {args.max_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
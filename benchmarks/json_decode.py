@@ -0,0 +1,57 @@
+"""
+Measures decode time per response for every installed JSON backend, on a
+multi-split /route response and a large /tokens list, plus typed route
+parsing. Run it against an installed checkout (`pip install -e .`):
+
+    python benchmarks/json_decode.py --tokens 3000
+"""
+import argparse
+import json
+import random
+import timeit
+
+from fibrous_python.json_backend import BACKENDS, get_json_loads
+from fibrous_python.mock_server import make_route, make_token
+from fibrous_python.utils import parse_route
+
+
+def bench(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def available_backends():
+    for name in BACKENDS:
+        try:
+            yield name, get_json_loads(name)
+        except ImportError:
+            print(f"{name}: not installed, skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=3000, help="entries in the /tokens payload")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = {
+        "route": json.dumps(make_route(rng)).encode(),
+        "tokens": json.dumps([make_token(rng, i) for i in range(args.tokens)]).encode(),
+    }
+
+    for name, body in payloads.items():
+        number = max(1, 2_000_000 // len(body))
+        print(f"\n/{name} response, {len(body) / 1024:.1f} KiB")
+        for backend, loads in available_backends():
+            print(f"  {backend:<16} {bench(lambda: loads(body), number) * 1e6:>10.1f} us")
+
+    body = payloads["route"]
+    print("\ntyped /route parsing")
+    print(f"  {'strict':<16} {bench(lambda: parse_route(body, 'strict'), 2000) * 1e6:>10.1f} us")
+    try:
+        print(f"  {'fast':<16} {bench(lambda: parse_route(body, 'fast'), 2000) * 1e6:>10.1f} us")
+    except ImportError:
+        print("  fast: msgspec not installed, skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Replays the quotes of a recorded cassette (`fibrous_python.Cassette`)
+through the installed SDK and reports its throughput and latency, the
+network being the cassette. Record production traffic with
+FIBROUS_CASSETTE=quotes.jsonl.gz FIBROUS_CASSETTE_MODE=record, then run it
+against each SDK version (`pip install -e .`):
+
+    python benchmarks/replay.py quotes.jsonl.gz --concurrency 32
+    python benchmarks/replay.py quotes.jsonl.gz --original-rate
+
+By default quotes are sent as fast as `--concurrency` allows and answered
+immediately, measuring the client alone. `--original-rate` sends them at
+their recorded times and answers after the recorded response time.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from fibrous_python import Cassette, FibrousRouter
+
+
+def recorded_quotes(cassette: Cassette):
+    # (offset, get_best_route arguments) of every recorded /route request
+    quotes = []
+    for exchange in cassette.exchanges():
+        parts = urlsplit(exchange.url)
+        chain_name, _, endpoint = parts.path.strip("/").partition("/")
+        if endpoint != "route":
+            continue
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        args = (int(params.pop("amount")), params.pop("tokenInAddress"), params.pop("tokenOutAddress"),
+                chain_name, params or None)
+        quotes.append((exchange.offset, args))
+    return quotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("cassette", help="recorded cassette file")
+    parser.add_argument("--concurrency", type=int, default=16, help="quotes in flight")
+    parser.add_argument("--original-rate", action="store_true",
+                        help="send at the recorded times with the recorded response times")
+    parser.add_argument("--parse", choices=["strict", "fast"], default=None)
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette, "replay" if args.original_rate else "fast")
+    quotes = recorded_quotes(cassette)
+    if not quotes:
+        parser.error(f"{args.cassette} holds no /route requests")
+    latencies, errors = [], []
+
+    def quote(offset: float, quote_args) -> None:
+        if args.original_rate:
+            time.sleep(max(0.0, started + offset - quotes[0][0] - time.perf_counter()))
+        sent = time.perf_counter()
+        try:
+            router.get_best_route(*quote_args, use_cache=False, parse=args.parse)
+        except Exception as e:
+            errors.append(e)
+            return
+        latencies.append(time.perf_counter() - sent)
+
+    workers = len(quotes) if args.original_rate else args.concurrency
+    with FibrousRouter(cassette=cassette, pool_maxsize=args.concurrency) as router, \
+            ThreadPoolExecutor(max_workers=min(workers, 512)) as executor:
+        started = time.perf_counter()
+        for offset, quote_args in quotes:
+            executor.submit(quote, offset, quote_args)
+        executor.shutdown(wait=True)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{len(quotes)} quotes in {elapsed:.2f}s, {len(quotes) / elapsed:.0f} q/s, {len(errors)} errors")
+    if latencies:
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        print(f"latency p50 {pick(0.5):.2f}ms p90 {pick(0.9):.2f}ms p99 {pick(0.99):.2f}ms "
+              f"mean {statistics.fmean(latencies) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from web3 import Web3
-from fibrous_python import FibrousRouter
+from web3.middleware import SignAndSendRawMiddlewareBuilder
+from fibrous_python import AsyncFibrousRouter
 from eth_utils import to_wei
 
 # RPC URL for the Scroll network
@@ -16,18 +17,21 @@ def account(private_key, rpc_url):
     Connect to the Scroll network and return the Web3 account instance.
     """
     web3 = Web3(Web3.HTTPProvider(rpc_url))
-    if not web3.isConnected():
+    if not web3.is_connected():
         raise Exception("Unable to connect to the RPC URL")
-    account_instance = web3.eth.account.privateKeyToAccount(private_key)
+    account_instance = web3.eth.account.from_key(private_key)
+    # transactions sent by the contract helpers (the approval) are signed
+    # locally with the account's key
+    web3.middleware_onion.inject(SignAndSendRawMiddlewareBuilder.build(account_instance), layer=0)
+    web3.eth.default_account = account_instance.address
     return web3, account_instance
 
 async def main():
     # Create a new router instance
-    fibrous = FibrousRouter()
+    fibrous = AsyncFibrousRouter()
 
     # Create a Web3 account instance
     web3, account_instance = account(PRIVATE_KEY, RPC_URL)
-    fibrous_contract = await fibrous.get_contract_with_account(account_instance, "scroll")
 
     # Build route options
     tokens = await fibrous.supported_tokens("scroll")
@@ -49,35 +53,28 @@ async def main():
     )
 
     # Approve the tokens
-    approve_response = await fibrous.build_approve_evm(
+    approve_response = fibrous.build_approve_evm(
         input_amount,
         token_in_address,
-        account_instance.address,
+        web3,
         "scroll"
     )
 
     if approve_response:
         try:
-            # Swap tokens
-            swap_txn = fibrous_contract.functions.swap(
-                swap_call["route"],
-                swap_call["swap_parameters"]
-            ).buildTransaction({
-                'from': account_instance.address,
-                'nonce': web3.eth.getTransactionCount(account_instance.address),
-                'gas': 2000000,
-                'gasPrice': web3.eth.gas_price,
-            })
-
-            signed_txn = web3.eth.account.sign_transaction(swap_txn, private_key=PRIVATE_KEY)
-            tx_hash = web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
-            print(f"https://scrollscan.com/tx/{receipt.transactionHash.hex()}")
+            # Swap tokens. The pipeline tracks the account nonce locally and
+            # does not wait for receipts, so more swaps can follow right away
+            pipeline = fibrous.swap_pipeline(web3, "scroll", signer=account_instance, gas=2000000)
+            pipeline.submit_swap(swap_call)
+            for submitted in pipeline.wait():
+                print(f"https://scrollscan.com/tx/{submitted.receipt['transactionHash'].hex()}")
         except Exception as e:
             print(f"Error swapping tokens: {e}")
     else:
         print("Error approving tokens")
 
+    await fibrous.close()
+
 if __name__ == "__main__":
     import asyncio
     asyncio.run(main())
@@ -1,2 +1,32 @@
 from .core import *
-from .utils import *
\ No newline at end of file
+from .async_core import *
+from .cache import *
+from .ratelimit import *
+from .hedging import *
+from .failover import *
+from .exceptions import *
+from .metrics import *
+from .timing import *
+from .cassette import *
+
+from . import models as _models, utils as _utils
+
+# `from .utils import *` would import the lazy helpers, take the rest
+globals().update((name, getattr(_utils, name)) for name in _utils.__all__
+                 if name not in _utils._LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    # chain specific helpers are resolved lazily by the subpackages
+    for package in (_utils, _models):
+        if name in package._LAZY_ATTRIBUTES:
+            return getattr(package, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_utils._LAZY_ATTRIBUTES) | set(_models._LAZY_ATTRIBUTES))
+
+
+__all__ = [name for name in globals() if not name.startswith("_")] + list(_utils._LAZY_ATTRIBUTES) + [
+    name for name in _models.__all__ if name in _models._LAZY_ATTRIBUTES]
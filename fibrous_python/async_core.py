@@ -0,0 +1,440 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Union
+
+from .cache import MetadataCache, QuoteCache, FRESH, MISS, STALE
+from .core import BaseRouter
+from .models import QuoteCurve, QuoteRequest, QuoteResult
+from .singleflight import AsyncSingleFlight
+from .ratelimit import AsyncRateLimiter, RateLimit
+from .hedging import HedgePolicy
+from .failover import FailoverPolicy
+from .utils.curve import ImpactSearch, build_curve
+from .utils.token_index import TokenIndex
+from .utils.allowance import AllowanceCache
+from .exceptions import DeadlineExceeded
+from .metrics import MetricsHook
+from .cassette import Cassette
+from .timing import CallTiming, clear_timing, current_timing, measure, server_time, timed_call, trace_phases
+from .transport import build_async_client, expired, time_left, DEFAULT_MAX_URL_LENGTH, DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT
+
+
+class AsyncFibrousRouter(BaseRouter):
+    """
+    asyncio version of FibrousRouter. Uses a pooled httpx client per base url,
+    so many quotes can be in flight from one event loop.
+    """
+
+    def __init__(self, dedicated_url: Optional[str] = None, api_key: Optional[str] = None,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, keep_alive: bool = True,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 quote_cache: Optional[QuoteCache] = None, single_flight: bool = True,
+                 json_backend: Optional[str] = None,
+                 rate_limits: Optional[Dict[str, RateLimit]] = None, hedge: Optional[HedgePolicy] = None,
+                 failover: Optional[FailoverPolicy] = None,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT, metrics: Optional[MetricsHook] = None,
+                 graph_url: Optional[str] = None, cassette: Optional[Cassette] = None,
+                 allowance_cache: Optional[AllowanceCache] = None):
+        super().__init__(dedicated_url, api_key, metadata_cache, quote_cache, json_backend,
+                         rate_limits, hedge, failover, timeout, metrics, graph_url, cassette,
+                         allowance_cache)
+        # identical concurrent requests share one network call
+        self._single_flight = AsyncSingleFlight() if single_flight else None
+        self._limiters = {endpoint: AsyncRateLimiter(limit) for endpoint, limit in self.rate_limits.items()}
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self._clients: Dict[str, Any] = {}
+        # strong references to background refresh tasks
+        self._background: Set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "AsyncFibrousRouter":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        for task in self._background:
+            task.cancel()
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def _client(self, base_url: str) -> Any:
+        client = self._clients.get(base_url)
+        if client is None:
+            client = build_async_client(pool_maxsize=self.pool_maxsize,
+                                        keep_alive=self.keep_alive,
+                                        cassette=self.cassette)
+            self._clients[base_url] = client
+        return client
+
+    async def _fetch(self, base_url: str, url: str, deadline: Optional[float] = None) -> bytes:
+        limiter = self._limiters.get(self._endpoint(url)) if self._limiters else None
+        if limiter is None:
+            response = await self._timed_get(base_url, url, deadline)
+        else:
+            response = await self._limited_get(limiter, base_url, url, deadline)
+        response.raise_for_status()
+        return response.content
+
+    async def _timed_get(self, base_url: str, url: str, deadline: Optional[float]) -> Any:
+        metrics = self.metrics
+        timing = current_timing()
+        started = time.perf_counter()
+        remaining = time_left(deadline)
+        try:
+            if timing is None:
+                request = self._client(base_url).get(url, headers=self.build_headers())
+            else:
+                request = self._traced_get(base_url, url, timing)
+            # cancels the request, and frees its connection, once the budget runs out
+            response = await asyncio.wait_for(request, remaining)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError) and expired(deadline):
+                raise DeadlineExceeded("deadline exceeded") from None
+            if metrics is not None:
+                metrics.on_error(self._endpoint(url), e)
+            raise
+        if metrics is not None:
+            metrics.on_request(self._endpoint(url), response.status_code,
+                               time.perf_counter() - started, len(response.content))
+        return response
+
+    async def _traced_get(self, base_url: str, url: str, timing: CallTiming) -> Any:
+        timing.start_attempt()
+        marks: Dict[str, float] = {}
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            marks[event.split(".", 1)[1]] = time.perf_counter()
+
+        response = await self._client(base_url).get(url, headers=self.build_headers(),
+                                                    extensions={"trace": trace})
+        if response.is_success:
+            timing.add_response(trace_phases(marks, time.perf_counter()), len(response.content))
+        return response
+
+    async def _limited_get(self, limiter: AsyncRateLimiter, base_url: str, url: str,
+                           deadline: Optional[float]) -> Any:
+        # retries 429 responses once the limiter lets the request through again
+        for attempt in range(limiter.config.max_retries + 1):
+            started = await limiter.acquire(deadline)
+            try:
+                response = await self._timed_get(base_url, url, deadline)
+            except DeadlineExceeded:
+                # timed out by our own budget, says nothing about the API
+                await limiter.abandon()
+                raise
+            except Exception:
+                await limiter.release(started)
+                raise
+            except BaseException:
+                # interrupted or cancelled, says nothing about the API
+                await limiter.abandon()
+                raise
+            await limiter.release(started, response.status_code, response.headers.get("Retry-After"))
+            if response.status_code != 429 or attempt == limiter.config.max_retries:
+                break
+            if self.metrics is not None:
+                self.metrics.on_retry(self._endpoint(url), "rate_limit")
+        return response
+
+    async def _request(self, base_url: str, url: str, deadline: Optional[float] = None) -> bytes:
+        pool = self.endpoint_pool
+        if pool is None or base_url != self.api_url:
+            return await self._send(base_url, url, deadline)
+
+        path, attempts = self._failover_plan(url)
+        tried = []
+        while True:
+            endpoint = pool.select(tried)
+            started = time.perf_counter()
+            try:
+                content = await self._send(endpoint.url, endpoint.url + path, deadline)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if expired(deadline):
+                    # out of budget, the endpoint is not to blame
+                    raise
+                if not self._is_endpoint_failure(e):
+                    # the endpoint answered, the request itself is wrong
+                    pool.record_success(endpoint)
+                    raise
+                pool.record_failure(endpoint)
+                tried.append(endpoint)
+                if len(tried) >= attempts:
+                    raise
+                if self.metrics is not None:
+                    self.metrics.on_retry(self._endpoint(url), "failover")
+                continue
+            pool.record_success(endpoint, time.perf_counter() - started)
+            return content
+
+    @staticmethod
+    def _is_endpoint_failure(error: Exception) -> bool:
+        import httpx
+
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        return isinstance(error, httpx.TransportError)
+
+    async def _send(self, base_url: str, url: str, deadline: Optional[float] = None) -> bytes:
+        hedger = self._hedger
+        endpoint = self._endpoint(url) if hedger is not None else None
+        if endpoint is None or not hedger.applies(endpoint):
+            return await self._fetch(base_url, url, deadline)
+
+        delay = hedger.start(endpoint)
+        if delay is None:
+            return await self._timed_fetch(endpoint, base_url, url, deadline)
+
+        tasks = {asyncio.ensure_future(self._timed_fetch(endpoint, base_url, url, deadline))}
+        try:
+            remaining = time_left(deadline)
+            done, _ = await asyncio.wait(tasks, timeout=delay if remaining is None else min(delay, remaining))
+            if not done and not expired(deadline) and hedger.try_hedge():
+                tasks.add(asyncio.ensure_future(self._timed_fetch(endpoint, base_url, url, deadline)))
+                if self.metrics is not None:
+                    self.metrics.on_hedge(endpoint)
+            pending = tasks
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    return done.pop().result()
+        finally:
+            # cancel the losing attempt, or both when the caller is cancelled
+            for task in tasks:
+                task.cancel()
+
+    async def _timed_fetch(self, endpoint: str, base_url: str, url: str, deadline: Optional[float]) -> bytes:
+        started = time.perf_counter()
+        content = await self._fetch(base_url, url, deadline)
+        self._hedger.record(endpoint, time.perf_counter() - started)
+        return content
+
+    async def _get(self, base_url: str, url: str, decode: Optional[Callable[[bytes], Any]] = None,
+                   deadline: Optional[float] = None) -> Any:
+        if deadline is None:
+            deadline = self._deadline()
+        try:
+            if self._single_flight is not None:
+                content = await self._coalesced(base_url, url, deadline)
+            else:
+                content = await self._request(base_url, url, deadline)
+        except DeadlineExceeded as e:
+            if self.metrics is not None:
+                self.metrics.on_error(self._endpoint(url), e)
+            raise
+        # coalesced callers share the raw body but decode their own copy
+        return measure("decode", decode or self._loads, content)
+
+    async def _coalesced(self, base_url: str, url: str, deadline: Optional[float]) -> bytes:
+        while True:
+            try:
+                return await self._single_flight.do(url, lambda: self._request(base_url, url, deadline),
+                                                    time_left(deadline))
+            except DeadlineExceeded:
+                if expired(deadline):
+                    raise
+                # the shared call ran out of the budget of the caller that
+                # started it, ours is not spent yet
+            except asyncio.TimeoutError:
+                # joined a call that outlives our own deadline
+                raise DeadlineExceeded("deadline exceeded") from None
+
+    async def _cached(self, kind: str, chain_name: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        cache = self.metadata_cache
+        if cache is None:
+            return await load()
+
+        key = (kind, chain_name)
+        state, value = cache.lookup(key)
+        if self.metrics is not None:
+            self.metrics.on_cache(kind, "hit" if state == FRESH else state)
+        if state == STALE and cache.begin_refresh(key):
+            task = asyncio.ensure_future(self._refresh(key, load))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        if state != MISS:
+            timing = current_timing()
+            if timing is not None:
+                timing.cached = True
+            return value
+
+        value = await load()
+        cache.set(key, value)
+        return value
+
+    async def _refresh(self, key: Any, load: Callable[[], Awaitable[Any]]) -> None:
+        clear_timing()
+        try:
+            self.metadata_cache.set(key, await load())
+        except Exception:
+            # keep serving the stale entry, the next lookup retries
+            pass
+        finally:
+            self.metadata_cache.end_refresh(key)
+
+    async def get_best_route(self, amount: int, token_in_address: str, token_out_address: str,
+                             chain_name: str, options: Optional[Dict[str, Any]] = None,
+                             use_cache: bool = True, parse: Optional[str] = None,
+                             timeout: Optional[float] = None, deadline: Optional[float] = None,
+                             timing: Optional[CallTiming] = None) -> Any:
+        """
+        Async version of FibrousRouter.get_best_route. Cancelling the call
+        cancels its requests and frees their connections.
+        """
+        with timed_call(timing):
+            cache = self.quote_cache if use_cache else None
+            if cache is not None:
+                route = cache.get(chain_name, token_in_address, token_out_address, amount, options)
+                if self.metrics is not None:
+                    self.metrics.on_cache("quote", "miss" if route is None else "hit")
+                if route is not None:
+                    if timing is not None:
+                        timing.cached = True
+                    return measure("validation", self._typed_route, route, parse)
+
+            url = self._route_url(amount, token_in_address, token_out_address, chain_name, options)
+            route = await self._get(self.api_url, url, self._route_decoder(parse),
+                                    self._deadline(timeout, deadline))
+            if self.quote_cache is not None and route.get("success"):
+                self.quote_cache.put(chain_name, token_in_address, token_out_address, amount, options, route)
+            if timing is not None:
+                timing.server = server_time(route)
+            return measure("validation", self._typed_route, route, parse)
+
+    async def get_best_routes(self, quote_requests: Iterable[Union[QuoteRequest, Sequence[Any]]],
+                              max_concurrency: int = DEFAULT_POOL_MAXSIZE,
+                              use_cache: bool = True, timeout: Optional[float] = None,
+                              deadline: Optional[float] = None) -> AsyncIterator[QuoteResult]:
+        """
+        Async version of FibrousRouter.get_best_routes. Yields each result as
+        soon as it completes, with errors captured per quote.
+        """
+        quotes = self._quote_requests(quote_requests)
+        deadline = self._deadline(timeout, deadline)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def quote(i: int, q: QuoteRequest) -> QuoteResult:
+            async with semaphore:
+                try:
+                    route = await self.get_best_route(q.amount, q.token_in_address,
+                                                      q.token_out_address, q.chain_name, q.options,
+                                                      use_cache, deadline=deadline)
+                except Exception as e:
+                    return QuoteResult(index=i, request=q, error=e)
+                return QuoteResult(index=i, request=q, route=route)
+
+        tasks = [asyncio.ensure_future(quote(i, q)) for i, q in enumerate(quotes)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # stop pending quotes if the caller abandons the iterator early
+            for task in tasks:
+                task.cancel()
+
+    async def quote_curve(self, token_in_address: str, token_out_address: str, chain_name: str,
+                          amounts: Iterable[int], options: Optional[Dict[str, Any]] = None,
+                          max_concurrency: int = DEFAULT_POOL_MAXSIZE) -> QuoteCurve:
+        """
+        Async version of FibrousRouter.quote_curve.
+        """
+        quotes = [(amount, token_in_address, token_out_address, chain_name, options) for amount in amounts]
+        results = [result async for result in
+                   self.get_best_routes(quotes, max_concurrency=max_concurrency, use_cache=False)]
+        return build_curve(token_in_address, token_out_address, chain_name, results)
+
+    async def max_amount_within_impact(self, token_in_address: str, token_out_address: str, chain_name: str,
+                                       max_impact: float, min_amount: int, max_amount: int,
+                                       tolerance: float = 0.01, probes: int = 1, max_requests: int = 32,
+                                       options: Optional[Dict[str, Any]] = None) -> QuoteCurve:
+        """
+        Async version of FibrousRouter.max_amount_within_impact.
+        """
+        search = ImpactSearch(token_in_address, token_out_address, chain_name, max_impact,
+                              min_amount, max_amount, tolerance, probes, max_requests)
+        while not search.done:
+            amounts = search.next_amounts()
+            quotes = [(amount, token_in_address, token_out_address, chain_name, options) for amount in amounts]
+            search.add([result async for result in
+                        self.get_best_routes(quotes, max_concurrency=len(quotes), use_cache=False)])
+        return search.curve()
+
+    async def supported_tokens(self, chain_name: str,
+                               timing: Optional[CallTiming] = None) -> Dict[str, Dict[str, Any]]:
+        with timed_call(timing):
+            index = await self.token_index(chain_name)
+            return index.symbol_map(chain_name)
+
+    async def token_index(self, chain_name: str) -> TokenIndex:
+        """
+        Returns the tokens of a chain indexed by address and symbol. Shares
+        the metadata cache entry with supported_tokens.
+        """
+        return await self._cached("tokens", chain_name, lambda: self._load_tokens(chain_name))
+
+    async def _load_tokens(self, chain_name: str) -> TokenIndex:
+        tokens = await self._get(self.graph_url, self._tokens_url(chain_name))
+        return measure("validation", self._parse_tokens, tokens, chain_name)
+
+    async def supported_protocols(self, chain_name: str) -> Dict[str, str]:
+        return await self._cached("protocols", chain_name, lambda: self._load_protocols(chain_name))
+
+    async def _load_protocols(self, chain_name: str) -> Dict[str, str]:
+        protocols = await self._get(self.graph_url, self._protocols_url(chain_name))
+        return self._parse_protocols(protocols)
+
+    async def build_transaction(self, amount: int, token_in_address: str, token_out_address: str,
+                                slippage: float, destination: str, chain_name: str,
+                                options: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                                deadline: Optional[float] = None,
+                                timing: Optional[CallTiming] = None) -> Union[Dict[str, Any], Any]:
+        with timed_call(timing):
+            url = self._transaction_url(amount, token_in_address, token_out_address,
+                                        slippage, destination, chain_name, options)
+            decode = self._decode_calldata if chain_name == "starknet" else None
+            calldata = await self._get(self.api_url, url, decode, self._deadline(timeout, deadline))
+            return measure("validation", self._parse_transaction, calldata, chain_name)
+
+    async def build_batch_transaction(self, amounts: List[int], token_in_addresses: List[str],
+                                      token_out_addresses: List[str], slippage: float,
+                                      destination: str, chain_name: str,
+                                      options: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                                      deadline: Optional[float] = None,
+                                      max_url_length: int = DEFAULT_MAX_URL_LENGTH,
+                                      max_concurrency: int = DEFAULT_POOL_MAXSIZE) -> Union[Dict[str, Any], Any]:
+        """
+        Async version of FibrousRouter.build_batch_transaction.
+        """
+        if chain_name != "starknet":
+            raise ValueError("Invalid chain ID")
+        urls = self._batch_transaction_urls(amounts, token_in_addresses, token_out_addresses,
+                                            slippage, destination, chain_name, options, max_url_length)
+        decode = self._decode_calldata_batch
+        deadline = self._deadline(timeout, deadline)
+        if not urls:
+            calldata = []
+        elif len(urls) == 1:
+            calldata = await self._get(self.api_url, urls[0], decode, deadline)
+        else:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def chunk(url: str) -> List[Any]:
+                async with semaphore:
+                    return await self._get(self.api_url, url, decode, deadline)
+
+            tasks = [asyncio.ensure_future(chunk(url)) for url in urls]
+            try:
+                chunks = await asyncio.gather(*tasks)
+            finally:
+                # a failed chunk fails the batch, stop the others
+                for task in tasks:
+                    task.cancel()
+            calldata = [call for chunk in chunks for call in chunk]
+        return self._parse_batch_transaction(calldata, chain_name)
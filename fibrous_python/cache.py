@@ -0,0 +1,173 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class MetadataCache:
+    """
+    Per-chain in-memory cache for supported_tokens and supported_protocols.
+
+    Entries younger than `ttl` are served as is. Entries older than `ttl` but
+    within `ttl + stale_ttl` are still served while the router refreshes them
+    in the background (stale-while-revalidate). Older entries are reloaded
+    synchronously. Keys are `(kind, chain_name)` pairs, kind being "tokens"
+    or "protocols".
+    """
+
+    def __init__(self, ttl: float = 300.0, stale_ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Tuple[str, str]) -> Tuple[str, Any]:
+        """
+        Returns the state of `key` (FRESH, STALE or MISS) and its cached value.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISS, None
+        age = self._clock() - entry[0]
+        if age < self.ttl:
+            return FRESH, entry[1]
+        if age < self.ttl + self.stale_ttl:
+            return STALE, entry[1]
+        return MISS, None
+
+    def set(self, key: Tuple[str, str], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+
+    def begin_refresh(self, key: Tuple[str, str]) -> bool:
+        """
+        Marks `key` as refreshing. Returns False if a refresh is already running.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, chain_name: Optional[str] = None, kind: Optional[str] = None) -> None:
+        """
+        Drops cached entries. Without arguments the whole cache is cleared.
+
+
+        Args:
+            chain_name (str, optional): Only drop entries of this chain.
+            kind (str, optional): Only drop "tokens" or "protocols" entries.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                entry_kind, entry_chain = key
+                if chain_name is not None and entry_chain != chain_name:
+                    continue
+                if kind is not None and entry_kind != kind:
+                    continue
+                del self._entries[key]
+
+
+class QuoteCache:
+    """
+    Short-lived LRU cache for get_best_route responses.
+
+    Amounts are grouped into logarithmic buckets `tolerance` wide, so a quote
+    for 1000 can answer a request for 1000.5. When the cached amount differs
+    from the requested one, `inputAmount` and `outputAmount` are scaled by the
+    amount ratio and the returned route carries `approximate: True`. Other
+    fields (route split, gas, per-protocol quotes) are those of the cached
+    quote. Never feed approximate quotes into transaction building.
+
+    Entries expire after `max_age_ms` milliseconds and, when `block_number`
+    is given, after `max_age_blocks` blocks.
+    """
+
+    def __init__(self, max_age_ms: Optional[float] = 1000.0, max_age_blocks: Optional[int] = None,
+                 block_number: Optional[Callable[[], int]] = None, max_entries: int = 1024,
+                 tolerance: float = 0.001, clock: Callable[[], float] = time.monotonic):
+        if max_age_blocks is not None and block_number is None:
+            raise ValueError("max_age_blocks requires a block_number callable")
+        self.max_age_ms = max_age_ms
+        self.max_age_blocks = max_age_blocks
+        self.block_number = block_number
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        self._clock = clock
+        # key -> (timestamp, block, amount, route)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[int], int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, amount: int) -> int:
+        if self.tolerance <= 0 or amount <= 0:
+            return amount
+        return math.floor(math.log(amount) / math.log1p(self.tolerance))
+
+    def _key(self, chain_name: str, token_in_address: str, token_out_address: str,
+             amount: int, options: Optional[Dict[str, Any]]) -> Hashable:
+        frozen_options = tuple(sorted((k, str(v)) for k, v in options.items())) if options else ()
+        return (chain_name, token_in_address.lower(), token_out_address.lower(),
+                self._bucket(amount), frozen_options)
+
+    def _block(self) -> Optional[int]:
+        return self.block_number() if self.block_number is not None else None
+
+    def get(self, chain_name: str, token_in_address: str, token_out_address: str,
+            amount: int, options: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns a cached route for the request, or None.
+        """
+        key = self._key(chain_name, token_in_address, token_out_address, amount, options)
+        current_block = self._block() if self.max_age_blocks is not None else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            timestamp, block, cached_amount, route = entry
+            expired = (self.max_age_ms is not None
+                       and (self._clock() - timestamp) * 1000 > self.max_age_ms)
+            if not expired and current_block is not None:
+                expired = current_block - block > self.max_age_blocks
+            if expired:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        if cached_amount == amount:
+            return dict(route)
+        # reverse quotes fix the output amount, only reuse them for the exact amount
+        if options and options.get("reverse"):
+            return None
+
+        approximate = dict(route)
+        approximate["inputAmount"] = str(amount)
+        approximate["outputAmount"] = str(int(route["outputAmount"]) * amount // cached_amount)
+        approximate["approximate"] = True
+        return approximate
+
+    def put(self, chain_name: str, token_in_address: str, token_out_address: str,
+            amount: int, options: Optional[Dict[str, Any]], route: Dict[str, Any]) -> None:
+        key = self._key(chain_name, token_in_address, token_out_address, amount, options)
+        entry = (self._clock(), self._block(), amount, dict(route))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,197 @@
+import atexit
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .exceptions import CassetteMiss
+
+
+# response headers the client reads, everything else is left out of cassettes
+RECORDED_HEADERS = ("content-type", "retry-after")
+
+CASSETTE_MODES = ("record", "replay", "fast")
+
+# cassettes opened from the environment, shared by every router of the process
+_from_env: Dict[Tuple[str, str], "Cassette"] = {}
+_from_env_lock = threading.Lock()
+
+
+class Exchange(NamedTuple):
+    """
+    One recorded request and its response.
+    """
+    # seconds since the recording started, when the request was sent
+    offset: float
+    # seconds from sending the request to reading the whole body
+    duration: float
+    method: str
+    # path and query, without scheme and host
+    url: str
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+    def to_line(self) -> str:
+        line: Dict[str, Any] = {"t": round(self.offset, 6), "d": round(self.duration, 6), "m": self.method,
+                                "u": self.url, "s": self.status, "h": self.headers}
+        try:
+            line["b"] = self.body.decode("utf-8")
+        except UnicodeDecodeError:
+            line["b64"] = base64.b64encode(self.body).decode("ascii")
+        return json.dumps(line, separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def from_line(cls, line: str) -> "Exchange":
+        data = json.loads(line)
+        body = data["b"].encode("utf-8") if "b" in data else base64.b64decode(data["b64"])
+        return cls(data["t"], data["d"], data["m"], data["u"], data["s"],
+                   [tuple(header) for header in data["h"]], body)
+
+
+def _relative_url(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def _match_key(method: str, url: str) -> Tuple[str, str, Tuple[Tuple[str, str], ...]]:
+    # the host is ignored, so traffic recorded against one API url (or
+    # failover endpoint) replays against any other, and parameter order too
+    parts = urlsplit(url)
+    return method.upper(), parts.path, tuple(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+
+class Cassette:
+    """
+    Recording of Fibrous API traffic, route and graph, one JSON line per
+    exchange, gzip compressed when the path ends with ".gz". Pass it as
+    `cassette` to a router, or set the FIBROUS_CASSETTE (path) and
+    FIBROUS_CASSETTE_MODE environment variables to plug it into every router
+    without code changes.
+
+    Requests are matched on method, path and query parameters, not on the
+    host or the request headers, so the API key is never stored. Repeated
+    requests get their recorded responses in order, starting over once all
+    were served. Response bodies replay byte for byte.
+
+
+    Args:
+        path (str): Cassette file.
+        mode (str): "record" sends requests to the API and writes every
+            exchange, replacing the file. "replay" answers from the file
+            after the recorded response time, "fast" answers from the file
+            immediately.
+    """
+
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Invalid cassette mode {mode!r}, expected one of {', '.join(CASSETTE_MODES)}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._file = None
+        self._raw = None
+        # {match key: recorded exchanges}, and the next one to serve
+        self._exchanges: Dict[Tuple, List[Exchange]] = {}
+        self._cursors: Dict[Tuple, int] = {}
+        if mode == "record":
+            self._started = time.monotonic()
+            self._raw = open(path, "wb")
+            # flushing a GzipFile forces a sync flush that ends the deflate
+            # block, one per exchange compresses badly, so only the raw file
+            # is flushed after every exchange
+            self._file = gzip.GzipFile(fileobj=self._raw, mode="wb") if path.endswith(".gz") else self._raw
+            # writes what the compressor still holds and the gzip trailer
+            atexit.register(self.close)
+        else:
+            for exchange in self.exchanges():
+                self._exchanges.setdefault(_match_key(exchange.method, exchange.url), []).append(exchange)
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """
+        Returns the cassette configured by FIBROUS_CASSETTE and
+        FIBROUS_CASSETTE_MODE ("replay" by default), None when the path is
+        not set. Every router of the process shares the same instance.
+        """
+        path = os.environ.get("FIBROUS_CASSETTE")
+        if not path:
+            return None
+        key = (path, os.environ.get("FIBROUS_CASSETTE_MODE") or "replay")
+        with _from_env_lock:
+            cassette = _from_env.get(key)
+            if cassette is None:
+                cassette = _from_env[key] = cls(*key)
+        return cassette
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def realtime(self) -> bool:
+        return self.mode == "replay"
+
+    def exchanges(self) -> Iterable[Exchange]:
+        """
+        Yields the recorded exchanges in the order they were sent, e.g. to
+        drive a replay at the original request rate.
+        """
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt", encoding="utf-8") as file:
+            try:
+                for line in file:
+                    # a recording interrupted before close can end mid line
+                    if line.endswith("\n") and line.strip():
+                        yield Exchange.from_line(line)
+            except EOFError:
+                # recording interrupted before the gzip trailer
+                pass
+
+    def record(self, method: str, url: str, status: int, headers: Iterable[Tuple[str, str]],
+               body: bytes, started: float, duration: float) -> None:
+        """
+        Appends an exchange, `started` being the `time.monotonic()` value
+        when the request was sent.
+        """
+        kept = [(name.lower(), value) for name, value in headers if name.lower() in RECORDED_HEADERS]
+        exchange = Exchange(started - self._started, duration, method.upper(), _relative_url(url),
+                            status, kept, body)
+        line = (exchange.to_line() + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self._raw.flush()
+
+    def play(self, method: str, url: str) -> Exchange:
+        """
+        Returns the recorded response of a request, CassetteMiss when the
+        request was never recorded.
+        """
+        key = _match_key(method, url)
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            raise CassetteMiss(f"{method} {_relative_url(url)} is not in cassette {self.path}")
+        with self._lock:
+            i = self._cursors.get(key, 0)
+            self._cursors[key] = (i + 1) % len(exchanges)
+        return exchanges[i]
+
+    def close(self) -> None:
+        with self._lock:
+            file, self._file = self._file, None
+            raw, self._raw = self._raw, None
+        if file is not None:
+            file.close()
+        if raw is not None and raw is not file:
+            raw.close()
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
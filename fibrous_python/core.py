@@ -1,18 +1,100 @@
+import threading
+import time
+from contextvars import copy_context
+from functools import partial
 import requests
-from .models import (erc20ABI, fibrousRouterABI)
-from web3 import Web3
-from web3.contract import Contract
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from .cache import MetadataCache, QuoteCache, FRESH, MISS, STALE
+from .models import QuoteCurve, QuoteRequest, QuoteResult
+from .json_backend import get_json_loads
+from .singleflight import SingleFlight
+from .ratelimit import ENDPOINTS, RateLimit, RateLimiter
+from .hedging import Hedger, HedgePolicy
+from .failover import EndpointPool, FailoverPolicy
+from .exceptions import DeadlineExceeded
+from .metrics import MetricsHook
+from .cassette import Cassette
+from .timing import CallTiming, connection_phases, current_timing, measure, server_time, timed_call
+from .utils.curve import ImpactSearch, build_curve
+from .utils.calldata import split_u256
+from .utils.route_helper import encode_query, fix_calldata, parse_route
+from .utils.token_index import TokenIndex
+from .utils.allowance import AllowanceCache, get_allowances
+from .utils.contract_registry import ContractRegistry
+from .utils.submission import NonceManager, SwapPipeline, DEFAULT_FEE_BUMP, DEFAULT_SWAP_GAS
+from .transport import build_session, expired, time_left, DEFAULT_MAX_URL_LENGTH, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-class FibrousRouter:
+if TYPE_CHECKING:
+    # web3 is only needed by the Scroll helpers and is imported on first use
+    from web3 import Web3
+    from web3.contract import Contract
+
+
+class BaseRouter:
+    """
+    Request building and response parsing shared by the sync and async routers.
+    """
     DEFAULT_API_URL = "https://api.fibrous.finance"
     GRAPH_API_URL = "https://graph.fibrous.finance"
     STARKNET_ROUTER_ADDRESS = "0x00f6f4CF62E3C010E0aC2451cC7807b5eEc19a40b0FaaCd00CCA3914280FDf5a"
-    SCROLL_ROUTER_ADDRESS = "0x4bb92d3f730d5a7976707570228f5cb7e09094c5"
+    SCROLL_ROUTER_ADDRESS = "0x4bB92d3f730d5A7976707570228f5cb7e09094C5"
 
-    def __init__(self, dedicated_url: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(self, dedicated_url: Optional[str] = None, api_key: Optional[str] = None,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 quote_cache: Optional[QuoteCache] = None, json_backend: Optional[str] = None,
+                 rate_limits: Optional[Dict[str, RateLimit]] = None, hedge: Optional[HedgePolicy] = None,
+                 failover: Optional[FailoverPolicy] = None,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT, metrics: Optional[MetricsHook] = None,
+                 graph_url: Optional[str] = None, cassette: Optional[Cassette] = None,
+                 allowance_cache: Optional[AllowanceCache] = None):
         self.api_url = dedicated_url.rstrip('/') if dedicated_url else self.DEFAULT_API_URL
+        # tokens and protocols, e.g. a mock_server.MockFibrousAPI
+        self.graph_url = graph_url.rstrip('/') if graph_url else self.GRAPH_API_URL
         self.api_key = api_key
+        self.metadata_cache = metadata_cache
+        self.quote_cache = quote_cache
+        # decodes response bytes, see json_backend.get_json_loads
+        self._loads = get_json_loads(json_backend)
+        # web3 providers and parsed contracts, shared by every Scroll helper
+        self.contracts = ContractRegistry()
+        # last known router allowances, kept in sync by build_approve_evm
+        # and SwapPipeline, None when every check reads the chain
+        self.allowances = allowance_cache
+        # {endpoint: RateLimit}, endpoints without an entry are not limited
+        self.rate_limits = dict(rate_limits or {})
+        for endpoint in self.rate_limits:
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"Invalid endpoint {endpoint!r}, expected one of {', '.join(ENDPOINTS)}")
+        # latency history and hedge budget, None when hedging is off
+        self._hedger = Hedger(hedge) if hedge is not None else None
+        # health of api_url and its fallbacks, None without failover
+        self.endpoint_pool = (EndpointPool([self.api_url, *failover.fallback_urls], failover)
+                              if failover is not None else None)
+        # default seconds a call may take in total, None waits forever
+        self.timeout = timeout
+        # receives request, retry, hedge and cache events, None when off
+        self.metrics = metrics
+        # records or replays all traffic, FIBROUS_CASSETTE when not given
+        self.cassette = cassette if cassette is not None else Cassette.from_env()
+
+    def _deadline(self, timeout: Optional[float] = None, deadline: Optional[float] = None) -> Optional[float]:
+        # absolute time.monotonic() deadline of a call, the earliest of the
+        # given deadline and timeout, the client default if neither is given
+        if timeout is None and deadline is None:
+            timeout = self.timeout
+        if timeout is not None:
+            by_timeout = time.monotonic() + timeout
+            deadline = by_timeout if deadline is None else min(deadline, by_timeout)
+        return deadline
+
+    def invalidate_metadata(self, chain_name: Optional[str] = None) -> None:
+        """
+        Drops cached supported_tokens / supported_protocols results.
+        """
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(chain_name)
 
     def build_headers(self) -> Dict[str, str]:
         headers = {}
@@ -21,62 +103,74 @@ class FibrousRouter:
         return headers
 
     def build_route_url(self, base_url: str, params: Dict[str, Any]) -> str:
-        return f"{base_url}?{'&'.join([f'{k}={v}' for k, v in params.items()])}"
+        return f"{base_url}?{encode_query(params)}"
 
-    def get_best_route(self, amount: int, token_in_address: str, token_out_address: str,
-                       chain_name: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _endpoint(self, url: str) -> str:
+        # "route", "execute" or "graph", the rate limit group of a request
+        path = url.split("?", 1)[0]
+        if path.endswith("/route"):
+            return "route"
+        if path.endswith(("/tokens", "/protocols")):
+            return "graph"
+        return "execute"
+
+    def _failover_plan(self, url: str) -> Tuple[str, int]:
+        # path of an api url relative to api_url, and how many endpoints to try
+        pool = self.endpoint_pool
+        retried = self._endpoint(url) in pool.policy.retry_endpoints
+        attempts = min(pool.policy.max_attempts, len(pool.endpoints)) if retried else 1
+        return url[len(self.api_url):], attempts
+
+    def _route_url(self, amount: int, token_in_address: str, token_out_address: str,
+                   chain_name: str, options: Optional[Dict[str, Any]] = None) -> str:
         route_params = {
             "amount": amount,
             "tokenInAddress": token_in_address,
             "tokenOutAddress": token_out_address
         }
-        
+
         if options:
             route_params.update(options)
-        
-        url = self.build_route_url(f"{self.api_url}/{chain_name}/route", route_params)
-        print(url)
-        response = requests.get(url, headers=self.build_headers())
-        response.raise_for_status()
-        return response.json()
 
-    def supported_tokens(self, chain_name: str) -> Dict[str, Dict[str, Any]]:
-        url = f"{self.GRAPH_API_URL}/{chain_name}/tokens"
-        response = requests.get(url, headers=self.build_headers())
-        response.raise_for_status()
-        tokens = response.json()
-        return {token['symbol'].lower(): token for token in tokens}
+        return self.build_route_url(f"{self.api_url}/{chain_name}/route", route_params)
 
-    def supported_protocols(self, chain_name: str) -> Dict[str, str]:
-        url = f"{self.GRAPH_API_URL}/{chain_name}/protocols"
-        response = requests.get(url, headers=self.build_headers())
-        response.raise_for_status()
-        protocols = response.json()
-        return {p['amm_name']: p['protocol'] for p in protocols}
+    def _quote_requests(self, quote_requests: Iterable[Union[QuoteRequest, Sequence[Any]]]) -> List[QuoteRequest]:
+        # tuples follow the get_best_route argument order:
+        # (amount, token_in_address, token_out_address, chain_name[, options])
+        return [
+            q if isinstance(q, QuoteRequest) else QuoteRequest(
+                **dict(zip(("amount", "token_in_address", "token_out_address",
+                            "chain_name", "options"), q)))
+            for q in quote_requests
+        ]
 
-    def build_approve_starknet(self, amount: int, token_address: str) -> Dict[str, Any]:
-        return {
-            "contractAddress": self.STARKNET_ROUTER_ADDRESS,
-            "entrypoint": "approve",
-            "calldata": [amount, token_address]
-        }
+    def _route_decoder(self, parse: Optional[str]) -> Callable[[bytes], Any]:
+        # the quote cache stores plain dicts, typed routes are built after it
+        if parse is None or self.quote_cache is not None:
+            return self._loads
+        return partial(parse_route, mode=parse)
 
-    def build_approve_evm(self, amount: int, token_address: str, account: Web3, chain_name: str) -> bool:
-        if chain_name == "scroll":
-            contract = account.eth.contract(address=token_address, abi=erc20ABI)
-            allowance = contract.functions.allowance(account.eth.default_account, self.SCROLL_ROUTER_ADDRESS).call()
-            if allowance >= amount:
-                return True
-            
-            tx = contract.functions.approve(self.SCROLL_ROUTER_ADDRESS, amount).transact()
-            account.eth.waitForTransactionReceipt(tx)
-            return True
-        else:
-            raise ValueError("Invalid chain ID")
+    def _decode_calldata(self, content: bytes) -> List[int]:
+        # Starknet calldata is handed out as felts, ready for Starknet.py
+        return fix_calldata(self._loads(content))
 
-    def build_transaction(self, amount: int, token_in_address: str, token_out_address: str,
-                          slippage: float, destination: str, chain_name: str,
-                          options: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], Any]:
+    def _decode_calldata_batch(self, content: bytes) -> List[List[int]]:
+        return [fix_calldata(call) for call in self._loads(content)]
+
+    def _typed_route(self, route: Any, parse: Optional[str]) -> Any:
+        if parse is None or not isinstance(route, dict):
+            return route
+        return parse_route(route, parse)
+
+    def _tokens_url(self, chain_name: str) -> str:
+        return f"{self.graph_url}/{chain_name}/tokens"
+
+    def _protocols_url(self, chain_name: str) -> str:
+        return f"{self.graph_url}/{chain_name}/protocols"
+
+    def _transaction_url(self, amount: int, token_in_address: str, token_out_address: str,
+                         slippage: float, destination: str, chain_name: str,
+                         options: Optional[Dict[str, Any]] = None) -> str:
         route_params = {
             "amount": amount,
             "tokenInAddress": token_in_address,
@@ -84,15 +178,67 @@ class FibrousRouter:
             "slippage": slippage,
             "destination": destination
         }
-        
+
         if options:
             route_params.update(options)
-        
-        url = self.build_route_url(f"{self.api_url}/{chain_name}/execute", route_params)
-        response = requests.get(url, headers=self.build_headers())
-        response.raise_for_status()
-        calldata = response.json()
-        
+
+        return self.build_route_url(f"{self.api_url}/{chain_name}/execute", route_params)
+
+    def _batch_transaction_url(self, amounts: List[int], token_in_addresses: List[str],
+                               token_out_addresses: List[str], slippage: float,
+                               destination: str, chain_name: str,
+                               options: Optional[Dict[str, Any]] = None) -> str:
+        route_params = {
+            "amounts": amounts,
+            "tokenInAddresses": token_in_addresses,
+            "tokenOutAddresses": token_out_addresses,
+            "slippage": slippage,
+            "destination": destination
+        }
+
+        if options:
+            route_params.update(options)
+
+        return self.build_route_url(f"{self.api_url}/{chain_name}/executeBatch", route_params)
+
+    def _batch_transaction_urls(self, amounts: List[int], token_in_addresses: List[str],
+                                token_out_addresses: List[str], slippage: float,
+                                destination: str, chain_name: str,
+                                options: Optional[Dict[str, Any]] = None,
+                                max_url_length: int = DEFAULT_MAX_URL_LENGTH) -> List[str]:
+        # executeBatch urls of consecutive swaps, each at most max_url_length long
+        if not len(amounts) == len(token_in_addresses) == len(token_out_addresses):
+            raise ValueError("amounts, token_in_addresses and token_out_addresses differ in length")
+        empty = len(self._batch_transaction_url([], [], [], slippage, destination, chain_name, options))
+        urls = []
+        start, length = 0, empty
+        for i, swap in enumerate(zip(amounts, token_in_addresses, token_out_addresses)):
+            # the encoded values of the swap, one in each of the three lists
+            size = len(encode_query({"": swap})) - len("=,,")
+            if i > start and length + size + 3 > max_url_length:
+                urls.append(self._batch_transaction_url(amounts[start:i], token_in_addresses[start:i],
+                                                        token_out_addresses[start:i], slippage,
+                                                        destination, chain_name, options))
+                start, length = i, empty
+            if i > start:
+                # separating commas
+                size += 3
+            if length + size > max_url_length:
+                raise ValueError(f"max_url_length {max_url_length} can not fit a single swap")
+            length += size
+        if start < len(amounts):
+            urls.append(self._batch_transaction_url(amounts[start:], token_in_addresses[start:],
+                                                    token_out_addresses[start:], slippage,
+                                                    destination, chain_name, options))
+        return urls
+
+    def _parse_tokens(self, tokens: List[Dict[str, Any]], chain_name: str) -> TokenIndex:
+        return TokenIndex.from_tokens(chain_name, tokens)
+
+    def _parse_protocols(self, protocols: List[Dict[str, Any]]) -> Dict[str, str]:
+        return {p['amm_name']: p['protocol'] for p in protocols}
+
+    def _parse_transaction(self, calldata: Any, chain_name: str) -> Union[Dict[str, Any], Any]:
         if chain_name == "starknet":
             return {
                 "contractAddress": self.STARKNET_ROUTER_ADDRESS,
@@ -104,26 +250,7 @@ class FibrousRouter:
         else:
             raise ValueError("Invalid chain ID")
 
-    def build_batch_transaction(self, amounts: List[int], token_in_addresses: List[str],
-                                token_out_addresses: List[str], slippage: float,
-                                destination: str, chain_name: str,
-                                options: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], Any]:
-        route_params = {
-            "amounts": amounts,
-            "tokenInAddresses": token_in_addresses,
-            "tokenOutAddresses": token_out_addresses,
-            "slippage": slippage,
-            "destination": destination
-        }
-        
-        if options:
-            route_params.update(options)
-        
-        url = self.build_route_url(f"{self.api_url}/{chain_name}/executeBatch", route_params)
-        response = requests.get(url, headers=self.build_headers())
-        response.raise_for_status()
-        calldata = response.json()
-        
+    def _parse_batch_transaction(self, calldata: Any, chain_name: str) -> Union[Dict[str, Any], Any]:
         if chain_name == "starknet":
             return [
                 {
@@ -136,15 +263,596 @@ class FibrousRouter:
         else:
             raise ValueError("Invalid chain ID")
 
-    def get_contract_instance(self, rpc_url: str, chain_name: str) -> Contract:
+    def build_approve_starknet(self, amount: int, token_address: str) -> Dict[str, Any]:
+        # approve(spender, amount: u256) on the token, amount as (low, high)
+        return {
+            "contractAddress": token_address,
+            "entrypoint": "approve",
+            "calldata": [int(self.STARKNET_ROUTER_ADDRESS, 16), *split_u256(amount)]
+        }
+
+    def build_approve_evm(self, amount: int, token_address: str, account: "Web3", chain_name: str,
+                          wait_for_receipt: bool = True) -> bool:
         if chain_name == "scroll":
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
-            return w3.eth.contract(address=self.SCROLL_ROUTER_ADDRESS, abi=fibrousRouterABI)
+            from .models.erc20ABI import erc20ABI
+            owner = account.eth.default_account
+            cache = self.allowances
+            if cache is not None:
+                allowance = cache.get(owner, token_address, self.SCROLL_ROUTER_ADDRESS)
+                if allowance is not None and allowance >= amount:
+                    return True
+
+            contract = self.contracts.contract_for(account, token_address, erc20ABI)
+            allowance = contract.functions.allowance(owner, self.SCROLL_ROUTER_ADDRESS).call()
+            if cache is not None:
+                cache.set(owner, token_address, self.SCROLL_ROUTER_ADDRESS, allowance)
+            if allowance >= amount:
+                return True
+
+            tx = contract.functions.approve(self.SCROLL_ROUTER_ADDRESS, amount).transact()
+            if cache is not None:
+                # only a confirmed approval is cached, read the chain until then
+                cache.invalidate(owner, token_address, self.SCROLL_ROUTER_ADDRESS)
+            if not wait_for_receipt:
+                return True
+            receipt = account.eth.wait_for_transaction_receipt(tx)
+            if receipt["status"] == 0:
+                return False
+            if cache is not None:
+                cache.set(owner, token_address, self.SCROLL_ROUTER_ADDRESS, amount)
+            return True
         else:
             raise ValueError("Invalid chain ID")
 
-    def get_contract_with_account(self, account: Web3, chain_name: str) -> Contract:
+    def get_allowances(self, account: "Web3", token_addresses: List[str], chain_name: str,
+                       owner: Optional[str] = None, multicall_address: Optional[str] = None) -> Dict[str, Optional[int]]:
+        """
+        Reads the router allowance of many tokens in one Multicall3 call and
+        stores the results in `self.allowances` when caching.
+        """
         if chain_name == "scroll":
-            return account.eth.contract(address=self.SCROLL_ROUTER_ADDRESS, abi=fibrousRouterABI)
+            owner = owner or account.eth.default_account
+            allowances = get_allowances(account, owner, token_addresses, self.SCROLL_ROUTER_ADDRESS,
+                                        self.contracts, multicall_address)
+            for token_address, allowance in allowances.items():
+                if allowance is not None and self.allowances is not None:
+                    self.allowances.set(owner, token_address, self.SCROLL_ROUTER_ADDRESS, allowance)
+            return allowances
         else:
             raise ValueError("Invalid chain ID")
+
+    def get_contract_instance(self, rpc_url: str, chain_name: str) -> "Contract":
+        if chain_name == "scroll":
+            from .models.fibrousRouterABI import fibrousRouterABI
+            return self.contracts.contract(chain_name, rpc_url, self.SCROLL_ROUTER_ADDRESS, fibrousRouterABI)
+        else:
+            raise ValueError("Invalid chain ID")
+
+    def get_contract_with_account(self, account: "Web3", chain_name: str) -> "Contract":
+        if chain_name == "scroll":
+            from .models.fibrousRouterABI import fibrousRouterABI
+            return self.contracts.contract_for(account, self.SCROLL_ROUTER_ADDRESS, fibrousRouterABI)
+        else:
+            raise ValueError("Invalid chain ID")
+
+    def swap_pipeline(self, account: "Web3", chain_name: str, signer: Any = None, gas: int = DEFAULT_SWAP_GAS,
+                      gas_price: Optional[int] = None, stuck_after: float = 60.0,
+                      fee_bump: float = DEFAULT_FEE_BUMP,
+                      nonce_manager: Optional[NonceManager] = None) -> SwapPipeline:
+        """
+        Returns a SwapPipeline sending swaps through the router contract of
+        `get_contract_with_account`, signed by `signer` (a LocalAccount) or
+        by the node for `account.eth.default_account`.
+        """
+        if chain_name == "scroll":
+            return SwapPipeline(self.get_contract_with_account(account, chain_name), signer, gas, gas_price,
+                                stuck_after, fee_bump, nonce_manager, self.allowances)
+        else:
+            raise ValueError("Invalid chain ID")
+
+
+class FibrousRouter(BaseRouter):
+
+    def __init__(self, dedicated_url: Optional[str] = None, api_key: Optional[str] = None,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 pool_block: bool = False, keep_alive: bool = True,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 quote_cache: Optional[QuoteCache] = None, single_flight: bool = True,
+                 json_backend: Optional[str] = None,
+                 rate_limits: Optional[Dict[str, RateLimit]] = None, hedge: Optional[HedgePolicy] = None,
+                 failover: Optional[FailoverPolicy] = None,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT, metrics: Optional[MetricsHook] = None,
+                 graph_url: Optional[str] = None, cassette: Optional[Cassette] = None,
+                 allowance_cache: Optional[AllowanceCache] = None):
+        super().__init__(dedicated_url, api_key, metadata_cache, quote_cache, json_backend,
+                         rate_limits, hedge, failover, timeout, metrics, graph_url, cassette,
+                         allowance_cache)
+        # identical concurrent requests share one network call
+        self._single_flight = SingleFlight() if single_flight else None
+        self._limiters = {endpoint: RateLimiter(limit) for endpoint, limit in self.rate_limits.items()}
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        # one pooled session per base url, so api and graph traffic never
+        # compete for the same connections
+        self._sessions: Dict[str, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+        # runs hedged requests, created on first use
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "FibrousRouter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+
+    def _session(self, base_url: str) -> requests.Session:
+        session = self._sessions.get(base_url)
+        if session is None:
+            with self._sessions_lock:
+                session = self._sessions.get(base_url)
+                if session is None:
+                    session = build_session(pool_connections=self.pool_connections,
+                                            pool_maxsize=self.pool_maxsize,
+                                            pool_block=self.pool_block,
+                                            keep_alive=self.keep_alive,
+                                            cassette=self.cassette)
+                    self._sessions[base_url] = session
+        return session
+
+    def _fetch(self, base_url: str, url: str, deadline: Optional[float] = None) -> bytes:
+        limiter = self._limiters.get(self._endpoint(url)) if self._limiters else None
+        if limiter is None:
+            response = self._http_get(base_url, url, deadline)
+        else:
+            response = self._limited_get(limiter, base_url, url, deadline)
+        response.raise_for_status()
+        return response.content
+
+    def _http_get(self, base_url: str, url: str, deadline: Optional[float]) -> requests.Response:
+        metrics = self.metrics
+        timing = current_timing()
+        timeout = time_left(deadline)
+        started = time.perf_counter()
+        try:
+            if timing is None:
+                response = self._session(base_url).get(url, headers=self.build_headers(), timeout=timeout)
+            else:
+                response = self._traced_get(base_url, url, timeout, timing)
+        except Exception as e:
+            if isinstance(e, requests.Timeout) and expired(deadline):
+                raise DeadlineExceeded("deadline exceeded") from e
+            if metrics is not None:
+                metrics.on_error(self._endpoint(url), e)
+            raise
+        if metrics is not None:
+            metrics.on_request(self._endpoint(url), response.status_code,
+                               time.perf_counter() - started, len(response.content))
+        if expired(deadline):
+            # the timeout only bounds each socket read, a body that trickles
+            # in can still arrive after the deadline
+            raise DeadlineExceeded("deadline exceeded")
+        return response
+
+    def _traced_get(self, base_url: str, url: str, timeout: Optional[float],
+                    timing: CallTiming) -> requests.Response:
+        # streams the body to time the headers and the download separately
+        timing.start_attempt()
+        started = time.perf_counter()
+        with connection_phases() as phases:
+            response = self._session(base_url).get(url, headers=self.build_headers(),
+                                                   timeout=timeout, stream=True)
+        headers = time.perf_counter()
+        try:
+            content = response.content
+        except BaseException:
+            response.close()
+            raise
+        phases["download"] = time.perf_counter() - headers
+        phases["ttfb"] = headers - started - phases.get("connect", 0.0) - phases.get("tls", 0.0)
+        if response.ok:
+            timing.add_response(phases, len(content))
+        return response
+
+    def _limited_get(self, limiter: RateLimiter, base_url: str, url: str,
+                     deadline: Optional[float]) -> requests.Response:
+        # retries 429 responses once the limiter lets the request through again
+        for attempt in range(limiter.config.max_retries + 1):
+            started = limiter.acquire(deadline)
+            try:
+                response = self._http_get(base_url, url, deadline)
+            except Exception:
+                if expired(deadline):
+                    # timed out by our own budget, says nothing about the API
+                    limiter.abandon()
+                else:
+                    limiter.release(started)
+                raise
+            except BaseException:
+                # interrupted or cancelled, says nothing about the API
+                limiter.abandon()
+                raise
+            limiter.release(started, response.status_code, response.headers.get("Retry-After"))
+            if response.status_code != 429 or attempt == limiter.config.max_retries:
+                break
+            if self.metrics is not None:
+                self.metrics.on_retry(self._endpoint(url), "rate_limit")
+        return response
+
+    def _request(self, base_url: str, url: str, deadline: Optional[float] = None) -> bytes:
+        pool = self.endpoint_pool
+        if pool is None or base_url != self.api_url:
+            return self._send(base_url, url, deadline)
+
+        path, attempts = self._failover_plan(url)
+        tried = []
+        while True:
+            endpoint = pool.select(tried)
+            started = time.perf_counter()
+            try:
+                content = self._send(endpoint.url, endpoint.url + path, deadline)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if expired(deadline):
+                    # out of budget, the endpoint is not to blame
+                    raise
+                if not self._is_endpoint_failure(e):
+                    # the endpoint answered, the request itself is wrong
+                    pool.record_success(endpoint)
+                    raise
+                pool.record_failure(endpoint)
+                tried.append(endpoint)
+                if len(tried) >= attempts:
+                    raise
+                if self.metrics is not None:
+                    self.metrics.on_retry(self._endpoint(url), "failover")
+                continue
+            pool.record_success(endpoint, time.perf_counter() - started)
+            return content
+
+    @staticmethod
+    def _is_endpoint_failure(error: Exception) -> bool:
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code >= 500
+        return isinstance(error, requests.RequestException)
+
+    def _send(self, base_url: str, url: str, deadline: Optional[float] = None) -> bytes:
+        hedger = self._hedger
+        endpoint = self._endpoint(url) if hedger is not None else None
+        if endpoint is None or not hedger.applies(endpoint):
+            return self._fetch(base_url, url, deadline)
+
+        delay = hedger.start(endpoint)
+        if delay is None:
+            return self._timed_fetch(endpoint, base_url, url, deadline)
+
+        # requests can not be interrupted, so the primary runs on the
+        # executor and the caller waits for whichever attempt answers first
+        executor = self._hedge_pool()
+        started = threading.Event()
+
+        def primary_fetch() -> bytes:
+            started.set()
+            return self._timed_fetch(endpoint, base_url, url, deadline)
+
+        # every attempt runs in a copy of the caller's context, see timing.current_timing
+        primary = executor.submit(copy_context().run, primary_fetch)
+        # the delay counts from when the primary is sent, time spent queued
+        # behind other calls on a busy executor says nothing about the API
+        started.wait(time_left(deadline))
+        remaining = time_left(deadline)
+        done, _ = wait([primary], timeout=delay if remaining is None else min(delay, remaining))
+        pending = {primary}
+        if not done and not expired(deadline) and hedger.try_hedge():
+            pending.add(executor.submit(copy_context().run, self._timed_fetch, endpoint, base_url, url, deadline))
+            if self.metrics is not None:
+                self.metrics.on_hedge(endpoint)
+
+        while True:
+            done, pending = wait(pending, timeout=time_left(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded("deadline exceeded")
+            for future in done:
+                if future.exception() is None:
+                    # the slower attempt finishes in the background
+                    return future.result()
+            if not pending:
+                return done.pop().result()
+
+    def _timed_fetch(self, endpoint: str, base_url: str, url: str, deadline: Optional[float]) -> bytes:
+        started = time.perf_counter()
+        content = self._fetch(base_url, url, deadline)
+        self._hedger.record(endpoint, time.perf_counter() - started)
+        return content
+
+    def _hedge_pool(self) -> ThreadPoolExecutor:
+        executor = self._hedge_executor
+        if executor is None:
+            with self._sessions_lock:
+                executor = self._hedge_executor
+                if executor is None:
+                    # a primary and a hedge per pooled connection
+                    executor = self._hedge_executor = ThreadPoolExecutor(max_workers=2 * self.pool_maxsize)
+        return executor
+
+    def _get(self, base_url: str, url: str, decode: Optional[Callable[[bytes], Any]] = None,
+             deadline: Optional[float] = None) -> Any:
+        if deadline is None:
+            deadline = self._deadline()
+        try:
+            if self._single_flight is not None:
+                content = self._coalesced(base_url, url, deadline)
+            else:
+                content = self._request(base_url, url, deadline)
+            if expired(deadline):
+                raise DeadlineExceeded("deadline exceeded")
+        except DeadlineExceeded as e:
+            if self.metrics is not None:
+                self.metrics.on_error(self._endpoint(url), e)
+            raise
+        # coalesced callers share the raw body but decode their own copy
+        return measure("decode", decode or self._loads, content)
+
+    def _coalesced(self, base_url: str, url: str, deadline: Optional[float]) -> bytes:
+        while True:
+            try:
+                return self._single_flight.do(url, lambda: self._request(base_url, url, deadline),
+                                              time_left(deadline))
+            except DeadlineExceeded:
+                if expired(deadline):
+                    raise
+                # the shared call ran out of the budget of the caller that
+                # started it, ours is not spent yet
+            except FuturesTimeoutError:
+                # joined a call that outlives our own deadline
+                raise DeadlineExceeded("deadline exceeded") from None
+
+    def _cached(self, kind: str, chain_name: str, load: Callable[[], Any]) -> Any:
+        cache = self.metadata_cache
+        if cache is None:
+            return load()
+
+        key = (kind, chain_name)
+        state, value = cache.lookup(key)
+        if self.metrics is not None:
+            self.metrics.on_cache(kind, "hit" if state == FRESH else state)
+        if state == STALE and cache.begin_refresh(key):
+            threading.Thread(target=self._refresh, args=(key, load), daemon=True).start()
+        if state != MISS:
+            timing = current_timing()
+            if timing is not None:
+                timing.cached = True
+            return value
+
+        value = load()
+        cache.set(key, value)
+        return value
+
+    def _refresh(self, key: Any, load: Callable[[], Any]) -> None:
+        try:
+            self.metadata_cache.set(key, load())
+        except Exception:
+            # keep serving the stale entry, the next lookup retries
+            pass
+        finally:
+            self.metadata_cache.end_refresh(key)
+
+    def get_best_route(self, amount: int, token_in_address: str, token_out_address: str,
+                       chain_name: str, options: Optional[Dict[str, Any]] = None,
+                       use_cache: bool = True, parse: Optional[str] = None,
+                       timeout: Optional[float] = None, deadline: Optional[float] = None,
+                       timing: Optional[CallTiming] = None) -> Any:
+        """
+        Returns the best route as the raw response dict, or as a typed route
+        when `parse` is "strict" (validated RouteSuccess) or "fast" (msgspec
+        RouteSuccessStruct), see `utils.parse_route`.
+
+        `timeout` (seconds) and `deadline` (a `time.monotonic()` value) bound
+        the whole call, including rate limit waits, retries and hedges, and
+        override the client `timeout`. DeadlineExceeded is raised when the
+        quote can not be returned in time.
+
+        Pass a CallTiming as `timing` to see where the time of the call went.
+        """
+        with timed_call(timing):
+            cache = self.quote_cache if use_cache else None
+            if cache is not None:
+                route = cache.get(chain_name, token_in_address, token_out_address, amount, options)
+                if self.metrics is not None:
+                    self.metrics.on_cache("quote", "miss" if route is None else "hit")
+                if route is not None:
+                    if timing is not None:
+                        timing.cached = True
+                    return measure("validation", self._typed_route, route, parse)
+
+            url = self._route_url(amount, token_in_address, token_out_address, chain_name, options)
+            route = self._get(self.api_url, url, self._route_decoder(parse), self._deadline(timeout, deadline))
+            if self.quote_cache is not None and route.get("success"):
+                self.quote_cache.put(chain_name, token_in_address, token_out_address, amount, options, route)
+            if timing is not None:
+                timing.server = server_time(route)
+            return measure("validation", self._typed_route, route, parse)
+
+    def get_best_routes(self, quote_requests: Iterable[Union[QuoteRequest, Sequence[Any]]],
+                        max_concurrency: int = DEFAULT_POOL_MAXSIZE,
+                        use_cache: bool = True, timeout: Optional[float] = None,
+                        deadline: Optional[float] = None) -> Iterator[QuoteResult]:
+        """
+        Quotes many pairs concurrently and yields each result as soon as it
+        completes. Errors are captured per quote, so a failing pair does not
+        abort the batch. Use `QuoteResult.index` to restore input order.
+
+
+        Args:
+            quote_requests: QuoteRequest objects or tuples in get_best_route
+                argument order (amount, token_in_address, token_out_address,
+                chain_name[, options]).
+            max_concurrency (int): Maximum quotes in flight. Keep it at or
+                below `pool_maxsize` to avoid opening throwaway connections.
+            use_cache (bool): Passed to get_best_route.
+            timeout (float, optional): Seconds the whole batch may take.
+            deadline (float, optional): `time.monotonic()` deadline of the
+                whole batch. Quotes still running then fail with
+                DeadlineExceeded.
+
+
+        Returns:
+            results (Iterator[QuoteResult]): Results in completion order.
+        """
+        quotes = self._quote_requests(quote_requests)
+        deadline = self._deadline(timeout, deadline)
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        try:
+            futures = {
+                executor.submit(self.get_best_route, q.amount, q.token_in_address,
+                                q.token_out_address, q.chain_name, q.options, use_cache,
+                                deadline=deadline): i
+                for i, q in enumerate(quotes)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                error = future.exception()
+                if error is None:
+                    yield QuoteResult(index=i, request=quotes[i], route=future.result())
+                else:
+                    yield QuoteResult(index=i, request=quotes[i], error=error)
+        finally:
+            # stop queued quotes if the caller abandons the iterator early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def quote_curve(self, token_in_address: str, token_out_address: str, chain_name: str,
+                    amounts: Iterable[int], options: Optional[Dict[str, Any]] = None,
+                    max_concurrency: int = DEFAULT_POOL_MAXSIZE) -> QuoteCurve:
+        """
+        Quotes a ladder of amounts of one pair concurrently and returns the
+        average price, marginal price and impact at every amount.
+
+
+        Args:
+            token_in_address (str): Input token.
+            token_out_address (str): Output token.
+            chain_name (str): Chain of the pair.
+            amounts (Iterable[int]): Raw input amounts, e.g. a geometric ladder.
+            options (dict, optional): Route options of every quote.
+            max_concurrency (int): Maximum quotes in flight.
+
+
+        Returns:
+            curve (QuoteCurve): Points sorted by amount. The quote cache is
+            bypassed, scaled quotes would hide the impact.
+        """
+        quotes = [(amount, token_in_address, token_out_address, chain_name, options) for amount in amounts]
+        results = self.get_best_routes(quotes, max_concurrency=max_concurrency, use_cache=False)
+        return build_curve(token_in_address, token_out_address, chain_name, results)
+
+    def max_amount_within_impact(self, token_in_address: str, token_out_address: str, chain_name: str,
+                                 max_impact: float, min_amount: int, max_amount: int,
+                                 tolerance: float = 0.01, probes: int = 1, max_requests: int = 32,
+                                 options: Optional[Dict[str, Any]] = None) -> QuoteCurve:
+        """
+        Finds the largest amount between `min_amount` and `max_amount` whose
+        price is at most `max_impact` (e.g. 0.01 = 1%) worse than the price
+        at `min_amount`, see `utils.ImpactSearch`.
+
+
+        Args:
+            max_impact (float): Accepted price impact out of 1.
+            min_amount (int): Reference amount, small enough to have no impact.
+            max_amount (int): Upper end of the search.
+            tolerance (float): Stop once the bracket is this narrow, relative.
+            probes (int): Amounts quoted concurrently per round, 1 bisects.
+            max_requests (int): Budget of /route calls.
+
+
+        Returns:
+            curve (QuoteCurve): Every quoted amount, `best` is the result or
+            None if `min_amount` could not be quoted.
+        """
+        search = ImpactSearch(token_in_address, token_out_address, chain_name, max_impact,
+                              min_amount, max_amount, tolerance, probes, max_requests)
+        while not search.done:
+            amounts = search.next_amounts()
+            quotes = [(amount, token_in_address, token_out_address, chain_name, options) for amount in amounts]
+            search.add(self.get_best_routes(quotes, max_concurrency=len(quotes), use_cache=False))
+        return search.curve()
+
+    def supported_tokens(self, chain_name: str, timing: Optional[CallTiming] = None) -> Dict[str, Dict[str, Any]]:
+        with timed_call(timing):
+            index = self.token_index(chain_name)
+            return index.symbol_map(chain_name)
+
+    def token_index(self, chain_name: str) -> TokenIndex:
+        """
+        Returns the tokens of a chain indexed by address and symbol. Shares
+        the metadata cache entry with supported_tokens.
+        """
+        return self._cached("tokens", chain_name, lambda: self._load_tokens(chain_name))
+
+    def _load_tokens(self, chain_name: str) -> TokenIndex:
+        tokens = self._get(self.graph_url, self._tokens_url(chain_name))
+        return measure("validation", self._parse_tokens, tokens, chain_name)
+
+    def supported_protocols(self, chain_name: str) -> Dict[str, str]:
+        return self._cached("protocols", chain_name, lambda: self._load_protocols(chain_name))
+
+    def _load_protocols(self, chain_name: str) -> Dict[str, str]:
+        protocols = self._get(self.graph_url, self._protocols_url(chain_name))
+        return self._parse_protocols(protocols)
+
+    def build_transaction(self, amount: int, token_in_address: str, token_out_address: str,
+                          slippage: float, destination: str, chain_name: str,
+                          options: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                          deadline: Optional[float] = None,
+                          timing: Optional[CallTiming] = None) -> Union[Dict[str, Any], Any]:
+        with timed_call(timing):
+            url = self._transaction_url(amount, token_in_address, token_out_address,
+                                        slippage, destination, chain_name, options)
+            decode = self._decode_calldata if chain_name == "starknet" else None
+            calldata = self._get(self.api_url, url, decode, self._deadline(timeout, deadline))
+            return measure("validation", self._parse_transaction, calldata, chain_name)
+
+    def build_batch_transaction(self, amounts: List[int], token_in_addresses: List[str],
+                                token_out_addresses: List[str], slippage: float,
+                                destination: str, chain_name: str,
+                                options: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                                deadline: Optional[float] = None,
+                                max_url_length: int = DEFAULT_MAX_URL_LENGTH,
+                                max_concurrency: int = DEFAULT_POOL_MAXSIZE) -> Union[Dict[str, Any], Any]:
+        """
+        Returns the Starknet swap calls of many swaps, in the order of the
+        inputs. Batches whose request url would exceed `max_url_length` are
+        split into consecutive chunks, requested concurrently (at most
+        `max_concurrency` at a time) within one `timeout` / `deadline`. The
+        call fails if any chunk fails.
+        """
+        if chain_name != "starknet":
+            raise ValueError("Invalid chain ID")
+        urls = self._batch_transaction_urls(amounts, token_in_addresses, token_out_addresses,
+                                            slippage, destination, chain_name, options, max_url_length)
+        decode = self._decode_calldata_batch
+        deadline = self._deadline(timeout, deadline)
+        if not urls:
+            calldata = []
+        elif len(urls) == 1:
+            calldata = self._get(self.api_url, urls[0], decode, deadline)
+        else:
+            executor = ThreadPoolExecutor(max_workers=min(max_concurrency, len(urls)))
+            try:
+                chunks = list(executor.map(lambda url: self._get(self.api_url, url, decode, deadline), urls))
+            finally:
+                # a failed chunk fails the batch, skip the ones not started yet
+                executor.shutdown(wait=False, cancel_futures=True)
+            calldata = [call for chunk in chunks for call in chunk]
+        return self._parse_batch_transaction(calldata, chain_name)
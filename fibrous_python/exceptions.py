@@ -0,0 +1,17 @@
+class FibrousError(Exception):
+    """
+    Base class of the errors raised by the Fibrous client itself. HTTP and
+    connection errors are raised as is by requests / httpx.
+    """
+
+
+class DeadlineExceeded(FibrousError, TimeoutError):
+    """
+    The time budget of a call ran out before a response arrived.
+    """
+
+
+class CassetteMiss(FibrousError):
+    """
+    A replayed request has no recorded response in the cassette.
+    """
@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from .ratelimit import ENDPOINTS
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an endpoint after `failure_threshold`
+    consecutive failures. After `reset_timeout` seconds one trial request is
+    let through (half-open): success closes the breaker, failure opens it
+    again. Not thread-safe, EndpointPool serializes access.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def ready_for_trial(self) -> bool:
+        # a trial that never reported back is retried after another timeout
+        return self.state != CLOSED and self._clock() - self.opened_at >= self.reset_timeout
+
+    def begin_trial(self) -> None:
+        self.state = HALF_OPEN
+        self.opened_at = self._clock()
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = self._clock()
+
+
+class FailoverPolicy:
+    """
+    Failover settings. The router's own API url (`dedicated_url` or the
+    public API) is always the first endpoint.
+
+
+    Args:
+        fallback_urls (Sequence[str]): Other API base urls.
+        failure_threshold (int): Consecutive failures (connection errors,
+            timeouts, 5xx) that open an endpoint's circuit breaker.
+        reset_timeout (float): Seconds before an open endpoint gets a trial
+            request.
+        alpha (float): Weight of the newest sample in the latency moving
+            average.
+        probe_interval (float): Seconds after which an endpoint that was not
+            picked is sent one request to refresh its latency.
+        max_attempts (int): Endpoints tried per request of a retried
+            endpoint group.
+        retry_endpoints (Iterable[str]): Endpoint groups retried on another
+            endpoint after a failure, see `ratelimit.ENDPOINTS`.
+    """
+
+    def __init__(self, fallback_urls: Sequence[str], failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, alpha: float = 0.2, probe_interval: float = 10.0,
+                 max_attempts: int = 2, retry_endpoints: Iterable[str] = ("route",)):
+        retry_endpoints = frozenset(retry_endpoints)
+        for endpoint in retry_endpoints:
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"Invalid endpoint {endpoint!r}, expected one of {', '.join(ENDPOINTS)}")
+        self.fallback_urls = [url.rstrip('/') for url in fallback_urls]
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.alpha = alpha
+        self.probe_interval = probe_interval
+        self.max_attempts = max_attempts
+        self.retry_endpoints = retry_endpoints
+
+
+class EndpointState:
+    """
+    Health of one API endpoint.
+    """
+
+    def __init__(self, url: str, breaker: CircuitBreaker):
+        self.url = url
+        self.breaker = breaker
+        # moving average of successful request latency, None until measured
+        self.latency: Optional[float] = None
+        self.last_used = 0.0
+
+    def __repr__(self) -> str:
+        latency = f"{self.latency * 1000:.1f}ms" if self.latency is not None else "n/a"
+        return f"EndpointState({self.url!r}, {self.breaker.state}, latency={latency})"
+
+
+class EndpointPool:
+    """
+    Picks the API endpoint of each request: the healthy endpoint with the
+    lowest moving-average latency, an open endpoint whose reset timeout
+    passed (trial request), or an endpoint not used for `probe_interval`.
+    When every breaker is open, the endpoint that opened first is used
+    rather than failing without a request.
+    """
+
+    def __init__(self, urls: Sequence[str], policy: FailoverPolicy,
+                 clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self._clock = clock
+        self.endpoints: List[EndpointState] = []
+        for url in urls:
+            if all(url != endpoint.url for endpoint in self.endpoints):
+                breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout, clock)
+                self.endpoints.append(EndpointState(url, breaker))
+        self._lock = threading.Lock()
+
+    def select(self, exclude: Sequence[EndpointState] = ()) -> Optional[EndpointState]:
+        """
+        Returns the endpoint for the next attempt, None once every endpoint
+        is in `exclude`.
+        """
+        now = self._clock()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+            if not candidates:
+                return None
+            chosen = self._choose(candidates, now)
+            chosen.last_used = now
+            return chosen
+
+    def _choose(self, candidates: List[EndpointState], now: float) -> EndpointState:
+        for endpoint in candidates:
+            if endpoint.breaker.ready_for_trial():
+                endpoint.breaker.begin_trial()
+                return endpoint
+
+        closed = [endpoint for endpoint in candidates if endpoint.breaker.state == CLOSED]
+        if not closed:
+            return min(candidates, key=lambda endpoint: endpoint.breaker.opened_at)
+
+        for endpoint in closed:
+            if endpoint.latency is None or now - endpoint.last_used >= self.policy.probe_interval:
+                return endpoint
+        # min keeps the configured order on ties, the dedicated url first
+        return min(closed, key=lambda endpoint: endpoint.latency)
+
+    def record_success(self, endpoint: EndpointState, seconds: Optional[float] = None) -> None:
+        """
+        Records a request the endpoint answered. `seconds` is None for
+        responses whose latency should not be averaged, e.g. 4xx errors.
+        """
+        with self._lock:
+            endpoint.breaker.record_success()
+            if seconds is not None:
+                if endpoint.latency is None:
+                    endpoint.latency = seconds
+                else:
+                    endpoint.latency += self.policy.alpha * (seconds - endpoint.latency)
+
+    def record_failure(self, endpoint: EndpointState) -> None:
+        with self._lock:
+            endpoint.breaker.record_failure()
@@ -0,0 +1,125 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+from .ratelimit import ENDPOINTS
+
+
+class HedgePolicy:
+    """
+    Hedging settings. A request that has not answered after the
+    `percentile` latency of recent requests to the same endpoint is sent a
+    second time, the first response wins.
+
+
+    Args:
+        percentile (float): Latency percentile after which to hedge, out of 1.
+        max_ratio (float): Hedges allowed per request on average, 0.05 caps
+            the extra load at 5%.
+        burst (float): Hedges allowed back to back after a calm period.
+        min_samples (int): Latencies needed before hedging starts.
+        window (int): Number of recent latencies the percentile is taken over.
+        min_delay (float): Never hedge earlier than this many seconds.
+        endpoints (Iterable[str]): Endpoint groups to hedge, see
+            `ratelimit.ENDPOINTS`. Graph metadata calls are not hedged by
+            default.
+    """
+
+    def __init__(self, percentile: float = 0.95, max_ratio: float = 0.05, burst: float = 10.0,
+                 min_samples: int = 20, window: int = 512, min_delay: float = 0.0,
+                 endpoints: Iterable[str] = ("route", "execute")):
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        endpoints = frozenset(endpoints)
+        for endpoint in endpoints:
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"Invalid endpoint {endpoint!r}, expected one of {', '.join(ENDPOINTS)}")
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.endpoints = endpoints
+
+
+class LatencyHistory:
+    """
+    Latencies of the last `window` requests with a cached percentile. The
+    percentile is recomputed after every `window // 16` new samples, so
+    reading it is O(1) on the request path.
+    """
+
+    def __init__(self, window: int = 512):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._refresh_every = max(window // 16, 1)
+        self._added = 0
+        self._sorted: Optional[list] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._added += 1
+            if self._added >= self._refresh_every:
+                self._sorted = None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Returns the `p` latency percentile (nearest rank), None without samples.
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+                self._added = 0
+            samples = self._sorted
+        return samples[min(int(p * len(samples)), len(samples) - 1)]
+
+
+class Hedger:
+    """
+    Per-router hedging state: latency history per endpoint and the hedge
+    budget. Every request deposits `max_ratio` into the budget (capped at
+    `burst`), every hedge takes one.
+    """
+
+    def __init__(self, policy: HedgePolicy):
+        self.policy = policy
+        self._histories: Dict[str, LatencyHistory] = {
+            endpoint: LatencyHistory(policy.window) for endpoint in policy.endpoints
+        }
+        self._budget = 0.0
+        self._lock = threading.Lock()
+
+    def applies(self, endpoint: str) -> bool:
+        return endpoint in self._histories
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        self._histories[endpoint].record(seconds)
+
+    def start(self, endpoint: str) -> Optional[float]:
+        """
+        Registers a request. Returns the seconds after which it should be
+        hedged, None while the endpoint has too little history.
+        """
+        with self._lock:
+            self._budget = min(self._budget + self.policy.max_ratio, self.policy.burst)
+        history = self._histories[endpoint]
+        if len(history) < self.policy.min_samples:
+            return None
+        return max(history.percentile(self.policy.percentile), self.policy.min_delay)
+
+    def try_hedge(self) -> bool:
+        """
+        Takes one hedge from the budget, False when it is exhausted.
+        """
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            return True
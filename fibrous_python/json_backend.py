@@ -0,0 +1,40 @@
+import json
+from typing import Any, Callable, Optional, Union
+
+JSONLoads = Callable[[Union[bytes, str]], Any]
+
+BACKENDS = ("msgspec", "orjson", "json")
+
+
+def get_json_loads(backend: Optional[str] = None) -> JSONLoads:
+    """
+    Returns a JSON decoder that works directly on response bytes.
+
+
+    Args:
+        backend (str, optional): "msgspec", "orjson" or "json". When omitted
+            msgspec is used if installed, otherwise the standard library.
+            orjson is never picked automatically: it decodes integers wider
+            than 64 bits as floats, which silently corrupts raw token
+            amounts. Only choose it when every amount is sent as a string.
+
+
+    Returns:
+        loads (Callable): Function decoding bytes or str into Python objects.
+    """
+    if backend is None:
+        try:
+            return get_json_loads("msgspec")
+        except ImportError:
+            return json.loads
+
+    if backend == "msgspec":
+        import msgspec
+        return msgspec.json.Decoder().decode
+    elif backend == "orjson":
+        import orjson
+        return orjson.loads
+    elif backend == "json":
+        return json.loads
+    else:
+        raise ValueError(f"Invalid JSON backend {backend!r}, expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,222 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# seconds, from a warm keep-alive quote to a stalled request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# response body bytes, from an execute call to a full token list
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class MetricsHook:
+    """
+    Receives the events of a router. Every method is a no-op, subclass and
+    override the events you need, e.g. to forward them to statsd or
+    OpenTelemetry. Methods are called on the request path, from any thread
+    of a FibrousRouter, so keep them cheap and thread-safe.
+
+    `endpoint` is the endpoint group of a request, see `ratelimit.ENDPOINTS`.
+    """
+
+    def on_request(self, endpoint: str, status: int, seconds: float, size: int) -> None:
+        """
+        An HTTP response arrived: its status, the seconds from sending the
+        request to reading the body and the body size in bytes.
+        """
+
+    def on_error(self, endpoint: str, error: BaseException) -> None:
+        """
+        A request failed without a response (connection error, timeout), or
+        a call ran out of its time budget (DeadlineExceeded, reported once
+        per call).
+        """
+
+    def on_retry(self, endpoint: str, reason: str) -> None:
+        """
+        A request is sent again, `reason` being "rate_limit" (after a 429)
+        or "failover" (on another API endpoint).
+        """
+
+    def on_hedge(self, endpoint: str) -> None:
+        """
+        A hedged duplicate of a slow request was sent.
+        """
+
+    def on_cache(self, kind: str, result: str) -> None:
+        """
+        A cache lookup, `kind` being "quote", "tokens" or "protocols" and
+        `result` "hit", "stale" or "miss".
+        """
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed upper bounds, as exposed by Prometheus.
+    Not thread-safe, MetricsRegistry serializes access.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        # one count per bucket plus the +Inf bucket, not cumulative
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """
+        Returns `(upper_bound, observations <= upper_bound)` pairs, the last
+        bound being infinity.
+        """
+        total = 0
+        result = []
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Returns the upper bound of the bucket holding the `q` quantile, None
+        without observations.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry(MetricsHook):
+    """
+    In-memory MetricsHook: per-endpoint latency and response size
+    histograms, and counters of status codes, errors, retries, hedges and
+    cache lookups. Export them with `to_prometheus`.
+
+
+    Args:
+        latency_buckets (Sequence[float]): Upper bounds of the latency
+            histogram, in seconds.
+        size_buckets (Sequence[float]): Upper bounds of the response size
+            histogram, in bytes.
+    """
+
+    def __init__(self, latency_buckets: Sequence[float] = LATENCY_BUCKETS,
+                 size_buckets: Sequence[float] = SIZE_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self.size_buckets = size_buckets
+        self.latency: Dict[str, Histogram] = {}
+        self.size: Dict[str, Histogram] = {}
+        self.responses: Dict[Tuple[str, int], int] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.retries: Dict[Tuple[str, str], int] = {}
+        self.hedges: Dict[str, int] = {}
+        self.cache: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def on_request(self, endpoint: str, status: int, seconds: float, size: int) -> None:
+        with self._lock:
+            latency = self.latency.get(endpoint)
+            if latency is None:
+                latency = self.latency[endpoint] = Histogram(self.latency_buckets)
+                self.size[endpoint] = Histogram(self.size_buckets)
+            latency.observe(seconds)
+            self.size[endpoint].observe(size)
+            key = (endpoint, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def on_error(self, endpoint: str, error: BaseException) -> None:
+        key = (endpoint, type(error).__name__)
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def on_retry(self, endpoint: str, reason: str) -> None:
+        key = (endpoint, reason)
+        with self._lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def on_hedge(self, endpoint: str) -> None:
+        with self._lock:
+            self.hedges[endpoint] = self.hedges.get(endpoint, 0) + 1
+
+    def on_cache(self, kind: str, result: str) -> None:
+        key = (kind, result)
+        with self._lock:
+            self.cache[key] = self.cache.get(key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            for metric in (self.latency, self.size, self.responses, self.errors,
+                           self.retries, self.hedges, self.cache):
+                metric.clear()
+
+    def to_prometheus(self, namespace: str = "fibrous") -> str:
+        """
+        Renders every metric in the Prometheus text exposition format, to be
+        served from a /metrics handler.
+
+
+        Args:
+            namespace (str): Prefix of the metric names.
+
+
+        Returns:
+            text (str): Exposition text, one sample per line.
+        """
+        lines: List[str] = []
+        with self._lock:
+            _histogram(lines, f"{namespace}_request_duration_seconds",
+                       "Time from sending a request to reading its body.", self.latency)
+            _histogram(lines, f"{namespace}_response_size_bytes",
+                       "Size of response bodies.", self.size)
+            _counter(lines, f"{namespace}_responses_total", "HTTP responses by status code.",
+                     ("endpoint", "status"), self.responses)
+            _counter(lines, f"{namespace}_request_errors_total", "Requests that failed without a response.",
+                     ("endpoint", "error"), self.errors)
+            _counter(lines, f"{namespace}_retries_total", "Requests sent again.",
+                     ("endpoint", "reason"), self.retries)
+            _counter(lines, f"{namespace}_hedges_total", "Hedged duplicate requests.",
+                     ("endpoint",), {(endpoint,): count for endpoint, count in self.hedges.items()})
+            _counter(lines, f"{namespace}_cache_lookups_total", "Quote and metadata cache lookups.",
+                     ("kind", "result"), self.cache)
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: Sequence[str], values: Sequence[object]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _counter(lines: List[str], name: str, help_text: str, label_names: Sequence[str],
+             values: Dict[Tuple, int]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, count in sorted(values.items()):
+        lines.append(f"{name}{_labels(label_names, key)} {count}")
+
+
+def _histogram(lines: List[str], name: str, help_text: str, histograms: Dict[str, Histogram]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for endpoint, histogram in sorted(histograms.items()):
+        for bound, total in histogram.cumulative():
+            lines.append(f"{name}_bucket{_labels(('endpoint', 'le'), (endpoint, _number(bound)))} {total}")
+        lines.append(f"{name}_sum{_labels(('endpoint',), (endpoint,))} {_number(histogram.sum)}")
+        lines.append(f"{name}_count{_labels(('endpoint',), (endpoint,))} {histogram.count}")
@@ -0,0 +1,404 @@
+"""
+Local stand-in for the Fibrous route and graph APIs, for load tests and
+benchmarks that must not touch the real API. Serves `/route`, `/execute`,
+`/executeBatch`, `/tokens` and `/protocols` of the starknet and scroll
+chains with generated payloads shaped like the real ones, and injects
+latency, jitter and errors:
+
+    with MockFibrousAPI(latency=0.05, jitter=0.01, error_rate=0.01) as api:
+        router = FibrousRouter(api.url, graph_url=api.url)
+
+or from a shell, for clients in other processes:
+
+    python -m fibrous_python.mock_server --port 8080 --latency 0.05
+"""
+import argparse
+import ast
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+CHAINS = ("starknet", "scroll")
+
+PROTOCOLS = ("10kSwap", "JediSwap", "MySwap", "SithSwap", "Ekubo", "Haiko", "Nostra",
+             "StarkDefi", "UniswapV3", "SyncSwap", "Ambient", "Zebra")
+
+
+def _evm_address(rng: random.Random) -> str:
+    # zero padded, web3 rejects shorter addresses
+    return f"0x{rng.getrandbits(160):040x}"
+
+
+def make_token(rng: random.Random, i: int, chain_name: str = "starknet") -> Dict[str, Any]:
+    """
+    Returns a /tokens entry with a random address, decimals and USD price.
+    """
+    return {
+        "address": _evm_address(rng) if chain_name == "scroll" else hex(rng.getrandbits(251)),
+        "name": f"Token {i}",
+        "symbol": f"TKN{i}",
+        "decimals": rng.choice([6, 8, 18]),
+        "price": f"{rng.uniform(0.0001, 5000):.6f}",
+        "imageUrl": f"https://assets.example.com/tokens/{i}.png",
+        "valuable": rng.random() < 0.3,
+        "verified": rng.random() < 0.5,
+        "category": None,
+    }
+
+
+def make_route(rng: random.Random, splits: int = 4, hops: int = 3, swaps_per_hop: int = 2,
+               input_token: Optional[Dict[str, Any]] = None, output_token: Optional[Dict[str, Any]] = None,
+               input_amount: int = 10 ** 18, output_amount: Optional[int] = None,
+               seconds: float = 1.354) -> Dict[str, Any]:
+    """
+    Returns a successful /route response splitting the amount over
+    `splits` paths of `hops` hops with `swaps_per_hop` pools each.
+    """
+    def swap():
+        return {
+            "protocol": rng.randrange(len(PROTOCOLS)),
+            "poolId": _evm_address(rng),
+            "poolAddress": _evm_address(rng),
+            "fromTokenAddress": _evm_address(rng),
+            "toTokenAddress": _evm_address(rng),
+            "percent": f"{100 // swaps_per_hop}%",
+        }
+
+    if output_amount is None:
+        output_amount = rng.getrandbits(70)
+    return {
+        "success": True,
+        "inputToken": input_token or make_token(rng, 0),
+        "inputAmount": str(input_amount),
+        "outputToken": output_token or make_token(rng, 1),
+        "outputAmount": str(output_amount),
+        "route": [
+            {"percent": f"{100 // splits}%",
+             "swaps": [[swap() for _ in range(swaps_per_hop)] for _ in range(hops)]}
+            for _ in range(splits)
+        ],
+        "estimatedGasUsed": str(rng.getrandbits(40)),
+        "bestQuotesByProtocols": [str(output_amount * rng.randrange(90, 100) // 100) for _ in range(10)],
+        "time": seconds,
+        "initial": True,
+    }
+
+
+def make_starknet_calldata(rng: random.Random, hops: int = 3) -> List[str]:
+    """
+    Returns /execute calldata of a Starknet swap: hex felts (addresses,
+    selectors) and decimal amounts.
+    """
+    calldata = [hex(rng.getrandbits(251)), hex(rng.getrandbits(251)), str(rng.getrandbits(64)), "0",
+                str(rng.getrandbits(64)), "0", hex(rng.getrandbits(251)), str(hops)]
+    for _ in range(hops):
+        calldata += [hex(rng.getrandbits(251)), hex(rng.getrandbits(251)), str(rng.randrange(1, 10 ** 6)),
+                     str(rng.randrange(len(PROTOCOLS))), hex(rng.getrandbits(251)), "0"]
+    return calldata
+
+
+def make_scroll_transaction(rng: random.Random, token_in: str, token_out: str, amount: int,
+                            destination: str, hops: int = 2) -> Dict[str, Any]:
+    """
+    Returns an /execute response of Scroll: the `route` and
+    `swap_parameters` arguments of the router's swap function.
+    """
+    return {
+        "route": {
+            "token_in": token_in,
+            "token_out": token_out,
+            "amount_in": str(amount),
+            "min_received": str(rng.getrandbits(64)),
+            "destination": destination,
+            "swap_type": 0,
+        },
+        "swap_parameters": [
+            {
+                "token_in": _evm_address(rng),
+                "token_out": _evm_address(rng),
+                "rate": rng.randrange(1, 10 ** 6),
+                "protocol_id": rng.randrange(len(PROTOCOLS)),
+                "pool_address": _evm_address(rng),
+                "swap_type": 0,
+                "extra_data": [],
+            }
+            for _ in range(hops)
+        ],
+    }
+
+
+def _list_param(query: Dict[str, List[str]], name: str) -> List[str]:
+    # accepts repeated keys, comma separated values and Python list literals
+    values = []
+    for value in query.get(name, []):
+        if value.startswith("["):
+            values += [str(v) for v in ast.literal_eval(value)]
+        else:
+            values += [v.strip() for v in value.split(",") if v.strip()]
+    return values
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # answers go out in one segment, no delayed ACK stall on keep-alive connections
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def do_GET(self) -> None:
+        api = self.server.api
+        parts = urlsplit(self.path)
+        segments = parts.path.strip("/").split("/")
+        kind = segments[-1] if len(segments) == 2 else ""
+        api._count(kind)
+
+        fault = api._fault()
+        if fault == "drop":
+            # the client sees a connection reset or an empty reply
+            self.close_connection = True
+            return
+        delay = api._delay()
+        if delay:
+            time.sleep(delay)
+        if fault is not None:
+            self._send(fault, {"message": "injected error"},
+                       {"Retry-After": str(api.retry_after)} if fault == 429 else None)
+            return
+
+        if len(segments) != 2 or segments[0] not in CHAINS:
+            self._send(404, {"message": "not found"})
+            return
+        try:
+            body = api._respond(segments[0], kind, parse_qs(parts.query), delay)
+        except (KeyError, ValueError, SyntaxError) as e:
+            self._send(400, {"message": f"bad request: {e}"})
+            return
+        if body is None:
+            self._send(404, {"message": "not found"})
+        else:
+            self._send(200, body)
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        body_delay = self.server.api.body_delay
+        if not body_delay:
+            self.wfile.write(payload)
+            return
+        # the body trickles in, every piece arriving well within a read timeout
+        pieces = 20
+        size = -(-len(payload) // pieces)
+        for start in range(0, len(payload), size):
+            time.sleep(body_delay / pieces)
+            self.wfile.write(payload[start:start + size])
+            self.wfile.flush()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops SYNs of concurrent clients, stalling them for a 1s retransmit
+    request_queue_size = 1024
+
+    def __init__(self, address, api: "MockFibrousAPI"):
+        super().__init__(address, _Handler)
+        self.api = api
+
+    def handle_error(self, request, client_address) -> None:
+        # clients hanging up mid response (timeouts, hedges) are expected
+        pass
+
+
+class MockFibrousAPI:
+    """
+    Local HTTP server answering like the Fibrous route and graph APIs. Point
+    both urls of a router at it: `FibrousRouter(api.url, graph_url=api.url)`.
+
+    Route responses are priced from the generated token list with a price
+    impact that grows with the USD value of the amount, so quote curves and
+    impact searches behave like against the real API.
+
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port, 0 picks a free one.
+        latency (float): Seconds every request is delayed.
+        jitter (float): Mean of an extra, exponentially distributed delay in
+            seconds, giving the long latency tail of a real network.
+        error_rate (float): Fraction of requests answered with `error_status`.
+        error_status (int): Status of injected errors, e.g. 500, 503 or 429.
+        retry_after (float): Retry-After seconds sent with injected 429s.
+        drop_rate (float): Fraction of connections closed without an answer.
+        tokens (int): Tokens per chain in the /tokens list.
+        splits (int): Paths of every route.
+        hops (int): Hops of every path.
+        liquidity (float): USD amount at which the price impact reaches 50%.
+        seed (int): Seed of the generated payloads and injected faults.
+        body_delay (float): Seconds a response body takes to arrive after
+            the headers, sent in small pieces.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 500,
+                 retry_after: float = 1.0, drop_rate: float = 0.0, tokens: int = 500,
+                 splits: int = 4, hops: int = 3, liquidity: float = 1e7, seed: int = 0,
+                 body_delay: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.drop_rate = drop_rate
+        self.splits = splits
+        self.hops = hops
+        self.liquidity = liquidity
+        self.seed = seed
+        self.body_delay = body_delay
+        rng = random.Random(seed)
+        self.tokens = {chain: [make_token(rng, i, chain) for i in range(tokens)] for chain in CHAINS}
+        self._by_address = {chain: {int(token["address"], 16): token for token in self.tokens[chain]}
+                            for chain in CHAINS}
+        self._payloads = {
+            (chain, "tokens"): json.dumps(self.tokens[chain]).encode() for chain in CHAINS
+        }
+        for chain in CHAINS:
+            self._payloads[(chain, "protocols")] = json.dumps(
+                [{"amm_name": name, "protocol": i} for i, name in enumerate(PROTOCOLS)]).encode()
+        # {kind: requests}, kind being "route", "execute", "tokens", ...
+        self.requests: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockFibrousAPI":
+        """
+        Serves requests from a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockFibrousAPI":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def serve_forever(self) -> None:
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def _fault(self) -> Any:
+        # None, "drop" or the status of an injected error
+        if not (self.error_rate or self.drop_rate):
+            return None
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.drop_rate:
+            return "drop"
+        if roll < self.drop_rate + self.error_rate:
+            return self.error_status
+        return None
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._rng.expovariate(1 / self.jitter)
+
+    def _token(self, chain_name: str, address: str) -> Dict[str, Any]:
+        token = self._by_address[chain_name].get(int(address, 16))
+        if token is None:
+            # unknown addresses quote like a dollar stable coin
+            token = {**make_token(random.Random(address), 0, chain_name), "address": address,
+                     "decimals": 18, "price": "1.0"}
+        return token
+
+    def _output_amount(self, token_in: Dict[str, Any], token_out: Dict[str, Any], amount: int) -> int:
+        usd = amount / 10 ** token_in["decimals"] * float(token_in["price"])
+        impact = usd / (usd + self.liquidity)
+        output = usd * (1 - impact) / float(token_out["price"])
+        return int(output * 10 ** token_out["decimals"])
+
+    def _respond(self, chain_name: str, kind: str, query: Dict[str, List[str]], delay: float) -> Any:
+        payload = self._payloads.get((chain_name, kind))
+        if payload is not None:
+            return payload
+
+        # responses depend on the request only, repeated requests get the same bytes
+        rng = random.Random(f"{self.seed}{chain_name}{sorted(query.items())}")
+        if kind == "route":
+            token_in = self._token(chain_name, query["tokenInAddress"][0])
+            token_out = self._token(chain_name, query["tokenOutAddress"][0])
+            amount = int(query["amount"][0])
+            return make_route(rng, self.splits, self.hops, input_token=token_in, output_token=token_out,
+                              input_amount=amount, output_amount=self._output_amount(token_in, token_out, amount),
+                              seconds=round(delay, 3))
+        if kind == "execute":
+            if chain_name == "starknet":
+                return make_starknet_calldata(rng, self.hops)
+            return make_scroll_transaction(rng, query["tokenInAddress"][0], query["tokenOutAddress"][0],
+                                           int(query["amount"][0]), query["destination"][0], self.hops)
+        if kind == "executeBatch" and chain_name == "starknet":
+            amounts = _list_param(query, "amounts")
+            if len(_list_param(query, "tokenInAddresses")) != len(amounts):
+                raise ValueError("amounts and tokenInAddresses differ in length")
+            return [make_starknet_calldata(rng, self.hops) for _ in amounts]
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Fibrous APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mean exponential extra delay")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=500, help="tokens per chain")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    api = MockFibrousAPI(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                         args.error_status, drop_rate=args.drop_rate, tokens=args.tokens, seed=args.seed)
+    print(f"serving the Fibrous API on {api.url}, stop with Ctrl+C")
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
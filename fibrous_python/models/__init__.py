@@ -1,5 +1,60 @@
+import importlib as _importlib
+import sys as _sys
+import types as _types
+
 from .route import *
 from .enums import *
 from .token import *
-from .erc20ABI import *
-from .fibrousRouterABI import *
+from .quote import *
+from .curve import *
+
+# the ABI literals are large and only used by the Scroll helpers, and the
+# msgspec structs need an optional dependency, so they are loaded on first
+# attribute access instead of at import time
+_LAZY_ATTRIBUTES = {
+    "erc20ABI": ".erc20ABI",
+    "fibrousRouterABI": ".fibrousRouterABI",
+    "multicall3ABI": ".multicall3ABI",
+    "MULTICALL3_ADDRESS": ".multicall3ABI",
+    # msgspec is optional, see fibrous_python.utils.route_helper.parse_route
+    "TokenStruct": ".structs",
+    "SwapStruct": ".structs",
+    "RouteStruct": ".structs",
+    "SlippageStruct": ".structs",
+    "RouteSuccessStruct": ".structs",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        module_name = _LAZY_ATTRIBUTES[name]
+        module = _importlib.import_module(module_name, __name__)
+        # importing a submodule binds it on the package under its own name,
+        # which for the ABIs is also the attribute name, rebind the attributes
+        for attribute, source in _LAZY_ATTRIBUTES.items():
+            if source == module_name:
+                globals()[attribute] = getattr(module, attribute)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _Models(_types.ModuleType):
+    def __setattr__(self, name: str, value):
+        # the import system also binds a submodule on the package when it is
+        # imported directly (`from fibrous_python.models.erc20ABI import ...`),
+        # keep the ABI itself under that name instead of the module
+        if isinstance(value, _types.ModuleType) and _LAZY_ATTRIBUTES.get(name) == "." + name:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+_sys.modules[__name__].__class__ = _Models
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+# star imports load the ABIs as they did before, the msgspec structs stay opt-in
+__all__ = [name for name in globals() if not name.startswith("_")] + [
+    name for name, module in _LAZY_ATTRIBUTES.items() if module != ".structs"]
@@ -0,0 +1,55 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict
+
+from .quote import QuoteResult
+
+
+class CurvePoint(BaseModel):
+    """
+    One quoted amount of a price-impact curve. Prices are output tokens per
+    input token, in token units (decimals applied).
+    """
+    # raw input amount
+    amount: int
+
+    # raw output amount
+    output_amount: int
+
+    # average price of the whole amount
+    price: float
+
+    # price of the amount added since the previous point of the curve
+    marginal_price: float
+
+    # price relative to the smallest quoted amount, out of 1
+    # -0.02 = 2% worse than the reference price
+    impact: float
+
+    # /route response of this amount
+    route: Optional[Dict[str, Any]] = None
+
+
+class QuoteCurve(BaseModel):
+    """
+    Price-impact curve of a pair, points sorted by amount.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    token_in_address: str
+    token_out_address: str
+    chain_name: str
+
+    # price of the smallest successfully quoted amount
+    reference_price: Optional[float] = None
+
+    points: List[CurvePoint]
+
+    # quotes that raised or returned an unsuccessful route
+    failed: List[QuoteResult] = []
+
+    # largest amount within the impact threshold, only set by
+    # max_amount_within_impact
+    best: Optional[CurvePoint] = None
+
+    # /route calls made to build the curve
+    requests: int = 0
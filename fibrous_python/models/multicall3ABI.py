@@ -0,0 +1,34 @@
+# Multicall3 is deployed at the same address on Scroll and most EVM chains
+# https://github.com/mds1/multicall
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+multicall3ABI = [
+    {
+        "type": "function",
+        "name": "aggregate3",
+        "stateMutability": "payable",
+        "inputs": [
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "internalType": "struct Multicall3.Call3[]",
+                "components": [
+                    {"name": "target", "type": "address", "internalType": "address"},
+                    {"name": "allowFailure", "type": "bool", "internalType": "bool"},
+                    {"name": "callData", "type": "bytes", "internalType": "bytes"},
+                ],
+            },
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "internalType": "struct Multicall3.Result[]",
+                "components": [
+                    {"name": "success", "type": "bool", "internalType": "bool"},
+                    {"name": "returnData", "type": "bytes", "internalType": "bytes"},
+                ],
+            },
+        ],
+    },
+]
@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class QuoteRequest(BaseModel):
+    """
+    Parameters of a single get_best_route call.
+    """
+    amount: int
+    token_in_address: str
+    token_out_address: str
+    chain_name: str
+    options: Optional[Dict[str, Any]] = None
+
+
+class QuoteResult(BaseModel):
+    """
+    Outcome of one quote in a bulk request. Exactly one of `route` and
+    `error` is set.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # position of the request in the input
+    index: int
+    request: QuoteRequest
+
+    # /route response
+    route: Optional[Dict[str, Any]] = None
+
+    # exception raised while quoting this request
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -1,4 +1,4 @@
-from typing import List, Union, Optional
+from typing import Any, List, NamedTuple, Union, Optional
 from pydantic import BaseModel
 from .token import Token
 
@@ -35,6 +35,14 @@ class Slippage(BaseModel):
     slippage: float
 
 
+class SlippageBatch(NamedTuple):
+    # Slippage fields as arrays, one element per quote (float64 arrays, or
+    # object arrays of Decimal in exact mode)
+    input_token_value: Any
+    output_token_value: Any
+    slippage: Any
+
+
 class RouteSuccess(BaseModel):
     success: bool
     inputToken: Token
@@ -53,6 +61,9 @@ class RouteSuccess(BaseModel):
     time: float
     initial: bool
 
+    # reused from QuoteCache for a nearby amount, amounts scaled
+    approximate: bool = False
+
 
 class RouteExecuteParams(BaseModel):
     amount: Union[int, str]
@@ -0,0 +1,58 @@
+from typing import List, Optional, Union
+
+import msgspec
+
+
+# Compact slotted mirrors of the pydantic models in route.py and token.py,
+# decoded straight from response bytes by msgspec. Field types are checked
+# while decoding, but none of the pydantic validation machinery runs.
+
+
+class TokenStruct(msgspec.Struct, kw_only=True, gc=False):
+    address: str
+    name: str
+    symbol: str
+    decimals: int
+    price: Union[str, float]
+    imageUrl: Optional[str] = None
+    valuable: Optional[bool] = None
+    verified: bool
+    category: Optional[str] = None
+
+
+class SwapStruct(msgspec.Struct, kw_only=True, gc=False):
+    protocol: int
+    poolId: str
+    poolAddress: str
+    fromTokenAddress: str
+    toTokenAddress: str
+    percent: str
+
+
+class RouteStruct(msgspec.Struct, kw_only=True, gc=False):
+    percent: str
+    swaps: List[List[SwapStruct]]
+
+
+class SlippageStruct(msgspec.Struct, kw_only=True, gc=False):
+    input_token_value: float
+    output_token_value: float
+    slippage: float
+
+
+class RouteSuccessStruct(msgspec.Struct, kw_only=True, gc=False):
+    success: bool
+    inputToken: TokenStruct
+    inputAmount: str
+    outputToken: TokenStruct
+    outputAmount: str
+    route: List[RouteStruct]
+    slippage: Optional[SlippageStruct] = None
+    estimatedGasUsed: str
+    bestQuotesByProtocols: List[str]
+    time: float
+    initial: bool
+    approximate: bool = False
+
+
+route_success_decoder = msgspec.json.Decoder(RouteSuccessStruct)
@@ -0,0 +1,267 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+from .exceptions import DeadlineExceeded
+from .transport import DEFAULT_POOL_MAXSIZE, time_left
+
+
+# endpoints that can be limited separately, see BaseRouter._endpoint
+ENDPOINTS = ("route", "execute", "graph")
+
+# responses that mean the API is overloaded and concurrency should drop
+OVERLOAD_STATUSES = frozenset({429, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header, either delay seconds or an HTTP date.
+
+
+    Args:
+        value (str, optional): Header value.
+
+
+    Returns:
+        seconds (float, optional): Seconds to wait, None if the header is
+        missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimit:
+    """
+    Rate limit settings of one endpoint.
+
+
+    Args:
+        rate (float, optional): Sustained requests per second, None for no
+            rate limit (concurrency is still limited).
+        burst (float, optional): Requests allowed at once after an idle
+            period, defaults to one second worth of `rate`.
+        max_concurrency (int): Upper bound of requests in flight.
+        min_concurrency (int): Lower bound the adaptive limit can drop to.
+        adaptive (bool): Adjust the concurrency limit AIMD-style: +1 per
+            window of successful requests, halved on 429 / 5xx overload
+            responses and transport errors.
+        max_retries (int): Times a 429 response is retried after waiting.
+        backoff (float): Seconds to pause after a 429 without Retry-After.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 max_concurrency: int = DEFAULT_POOL_MAXSIZE, min_concurrency: int = 1,
+                 adaptive: bool = True, max_retries: int = 3, backoff: float = 1.0):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError("expected 1 <= min_concurrency <= max_concurrency")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 1.0, 1.0)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.adaptive = adaptive
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `reserve` takes a token right away and returns
+    how long the caller has to wait before using it, so waiting callers are
+    served in reservation order.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - 1
+            self._updated = now
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class AIMDLimit:
+    """
+    Additive increase, multiplicative decrease concurrency limit.
+
+    The limit grows by one per `limit` successful requests and is multiplied
+    by `decrease` on overload. Overloads of requests started before the last
+    decrease are ignored, so one burst of 429s only shrinks the limit once.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1, decrease: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decrease = decrease
+        self.limit = float(maximum)
+        self._clock = clock
+        self._last_decrease = float("-inf")
+
+    def on_success(self) -> None:
+        self.limit = min(self.limit + 1 / self.limit, self.maximum)
+
+    def on_overload(self, started: float) -> None:
+        if started >= self._last_decrease:
+            self.limit = max(self.limit * self.decrease, self.minimum)
+            self._last_decrease = self._clock()
+
+
+class _LimiterState:
+    # bookkeeping shared by the sync and async limiters, callers hold their lock
+
+    def __init__(self, config: RateLimit, clock: Callable[[], float]):
+        self.config = config
+        self.clock = clock
+        self.bucket = TokenBucket(config.rate, config.burst, clock) if config.rate else None
+        self.concurrency = AIMDLimit(config.max_concurrency, config.min_concurrency, clock=clock)
+        self.in_flight = 0
+        self.paused_until = 0.0
+
+    def has_slot(self) -> bool:
+        return self.in_flight < int(self.concurrency.limit)
+
+    def delay(self) -> float:
+        # seconds until the request may be sent
+        delay = self.bucket.reserve() if self.bucket is not None else 0.0
+        return max(delay, self.paused_until - self.clock())
+
+    def record(self, started: float, status: Optional[int], retry_after: Optional[str]) -> None:
+        self.in_flight -= 1
+        if self.config.adaptive:
+            if status is None or status in OVERLOAD_STATUSES:
+                self.concurrency.on_overload(started)
+            else:
+                self.concurrency.on_success()
+        if status == 429:
+            pause = parse_retry_after(retry_after)
+            if pause is None:
+                pause = self.config.backoff
+            self.paused_until = max(self.paused_until, self.clock() + pause)
+
+
+class RateLimiter:
+    """
+    Limits the requests of one endpoint made from threads: at most
+    `concurrency.limit` in flight and `rate` per second. Every `acquire`
+    must be paired with a `release`.
+    """
+
+    def __init__(self, config: RateLimit, clock: Callable[[], float] = time.monotonic):
+        self.config = config
+        self._state = _LimiterState(config, clock)
+        self._condition = threading.Condition()
+
+    @property
+    def concurrency(self) -> AIMDLimit:
+        return self._state.concurrency
+
+    def acquire(self, deadline: Optional[float] = None) -> float:
+        """
+        Blocks until the request may be sent. Returns its start time, to be
+        passed to `release`. Raises DeadlineExceeded right away when the
+        request could not be sent before `deadline` (a `time.monotonic()`
+        value).
+        """
+        state = self._state
+        with self._condition:
+            if not self._condition.wait_for(state.has_slot, time_left(deadline)):
+                raise DeadlineExceeded("deadline exceeded waiting for a rate limit slot")
+            state.in_flight += 1
+            delay = state.delay()
+        try:
+            remaining = time_left(deadline)
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded("rate limit delay exceeds the deadline")
+            if delay > 0:
+                time.sleep(delay)
+        except BaseException:
+            self.abandon()
+            raise
+        return state.clock()
+
+    def release(self, started: float, status: Optional[int] = None, retry_after: Optional[str] = None) -> None:
+        """
+        Frees the slot of a finished request.
+
+
+        Args:
+            started (float): Value returned by `acquire`.
+            status (int, optional): HTTP status, None on transport errors.
+            retry_after (str, optional): Retry-After header of the response.
+        """
+        with self._condition:
+            self._state.record(started, status, retry_after)
+            self._condition.notify_all()
+
+    def abandon(self) -> None:
+        """
+        Frees the slot of a request that was interrupted before it
+        completed, without adapting the limit.
+        """
+        with self._condition:
+            self._state.in_flight -= 1
+            self._condition.notify_all()
+
+
+class AsyncRateLimiter:
+    """
+    asyncio version of RateLimiter, for use from a single event loop.
+    """
+
+    def __init__(self, config: RateLimit, clock: Callable[[], float] = time.monotonic):
+        self.config = config
+        self._state = _LimiterState(config, clock)
+        self._condition = asyncio.Condition()
+
+    @property
+    def concurrency(self) -> AIMDLimit:
+        return self._state.concurrency
+
+    async def acquire(self, deadline: Optional[float] = None) -> float:
+        state = self._state
+        async with self._condition:
+            try:
+                await asyncio.wait_for(self._condition.wait_for(state.has_slot), time_left(deadline))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("deadline exceeded waiting for a rate limit slot") from None
+            state.in_flight += 1
+            delay = state.delay()
+        try:
+            remaining = time_left(deadline)
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded("rate limit delay exceeds the deadline")
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            await self.abandon()
+            raise
+        return state.clock()
+
+    async def release(self, started: float, status: Optional[int] = None, retry_after: Optional[str] = None) -> None:
+        async with self._condition:
+            self._state.record(started, status, retry_after)
+            self._condition.notify_all()
+
+    async def abandon(self) -> None:
+        async with self._condition:
+            self._state.in_flight -= 1
+            self._condition.notify_all()
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls made from threads. While a call for
+    a key is in flight, later callers with the same key wait for it and
+    receive its result (or exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Runs `fn` or joins the call already in flight for `key`. Waiting
+        callers give up after `timeout` seconds with TimeoutError, the
+        shared call keeps running.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(timeout)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """
+    asyncio version of SingleFlight. The shared call runs in its own task, so
+    cancelling one waiter does not cancel it for the others. Once every
+    waiter is cancelled or timed out the shared call is cancelled too.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            if timeout is None:
+                return await asyncio.shield(task)
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        finally:
+            waiters = self._waiters.pop(task, 1) - 1
+            if waiters:
+                self._waiters[task] = waiters
+            elif not task.done():
+                # nobody is left to receive the result
+                task.cancel()
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # mark the exception as retrieved when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
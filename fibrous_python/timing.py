@@ -0,0 +1,189 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+PHASES = ("connect", "tls", "ttfb", "download", "decode", "validation")
+
+
+class CallTiming:
+    """
+    Where the time of one router call went. Pass an instance as `timing` to
+    get_best_route, build_transaction or supported_tokens, the router fills
+    it in. All durations are in seconds, None when the phase did not happen.
+
+    The network phases are those of the first successful response, other
+    attempts (retries, hedges, failover) are only counted in `attempts`.
+
+
+    Attributes:
+        connect (float, optional): DNS lookup and TCP connect, None when a
+            pooled connection was reused.
+        tls (float, optional): TLS handshake, None on reused connections.
+        ttfb (float, optional): From sending the request to receiving the
+            response headers: network round trip plus server time.
+        download (float, optional): Reading the response body.
+        decode (float, optional): JSON decoding. With `parse` and no quote
+            cache, routes are decoded straight into typed routes and the
+            whole conversion is reported here.
+        validation (float, optional): Building models from decoded JSON.
+        total (float, optional): Wall time of the call.
+        server (float, optional): Routing time reported by the API in the
+            route's `time` field.
+        size (int, optional): Response body bytes.
+        attempts (int): HTTP requests sent, including retries and hedges.
+        cached (bool): Served from the quote or metadata cache.
+    """
+
+    def __init__(self):
+        self.connect: Optional[float] = None
+        self.tls: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.download: Optional[float] = None
+        self.decode: Optional[float] = None
+        self.validation: Optional[float] = None
+        self.total: Optional[float] = None
+        self.server: Optional[float] = None
+        self.size: Optional[int] = None
+        self.attempts = 0
+        self.cached = False
+        self._lock = threading.Lock()
+
+    @property
+    def coalesced(self) -> bool:
+        """
+        True when the call joined an identical request already in flight,
+        so it has no network phases of its own.
+        """
+        return self.total is not None and not self.cached and self.attempts == 0
+
+    @property
+    def network(self) -> Optional[float]:
+        """
+        Time to first byte not spent routing on the server: round trip,
+        queueing and proxies. None without `server` time.
+        """
+        if self.ttfb is None or self.server is None:
+            return None
+        return self.ttfb - self.server
+
+    def start_attempt(self) -> None:
+        with self._lock:
+            self.attempts += 1
+
+    def add_response(self, phases: Dict[str, float], size: int) -> None:
+        """
+        Records the network phases of a successful response, unless an
+        earlier response already did.
+        """
+        with self._lock:
+            if self.ttfb is not None:
+                return
+            for phase in ("connect", "tls", "ttfb", "download"):
+                setattr(self, phase, phases.get(phase))
+            self.size = size
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **{phase: getattr(self, phase) for phase in PHASES},
+            "total": self.total, "server": self.server, "network": self.network,
+            "size": self.size, "attempts": self.attempts, "cached": self.cached,
+            "coalesced": self.coalesced,
+        }
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={value * 1000:.2f}ms" if isinstance(value, float) else f"{key}={value}"
+                           for key, value in self.as_dict().items() if value is not None)
+        return f"CallTiming({fields})"
+
+
+_current: ContextVar[Optional[CallTiming]] = ContextVar("fibrous_call_timing", default=None)
+
+# phases of the connection being opened by this thread, see transport.TimedHTTPAdapter
+_connection = threading.local()
+
+
+def current_timing() -> Optional[CallTiming]:
+    return _current.get()
+
+
+@contextmanager
+def timed_call(timing: Optional[CallTiming]) -> Iterator[Optional[CallTiming]]:
+    """
+    Makes `timing` the record of the requests made inside the block, and
+    sets its `total`. Does nothing when `timing` is None.
+    """
+    if timing is None:
+        yield None
+        return
+    token = _current.set(timing)
+    started = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.total = time.perf_counter() - started
+        _current.reset(token)
+
+
+def clear_timing() -> None:
+    # background tasks copy the context of the call that started them
+    _current.set(None)
+
+
+def measure(phase: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Returns `fn(*args)`, adding its duration to `phase` of the current
+    CallTiming if there is one.
+    """
+    timing = _current.get()
+    if timing is None:
+        return fn(*args)
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        setattr(timing, phase, (getattr(timing, phase) or 0.0) + time.perf_counter() - started)
+
+
+@contextmanager
+def connection_phases() -> Iterator[Dict[str, float]]:
+    """
+    Collects the connect and TLS time of connections opened by the current
+    thread inside the block.
+    """
+    phases: Dict[str, float] = {}
+    _connection.phases = phases
+    try:
+        yield phases
+    finally:
+        _connection.phases = None
+
+
+def record_connection_phase(phase: str, seconds: float) -> None:
+    phases = getattr(_connection, "phases", None)
+    if phases is not None:
+        phases[phase] = seconds
+
+
+def trace_phases(marks: Dict[str, float], finished: float) -> Dict[str, float]:
+    """
+    Network phases from the times of httpcore trace events, keyed without
+    their "connection." / "http11." prefix, see httpx `extensions["trace"]`.
+    """
+    phases: Dict[str, float] = {}
+    for phase, event in (("connect", "connect_tcp"), ("tls", "start_tls")):
+        if f"{event}.complete" in marks:
+            phases[phase] = marks[f"{event}.complete"] - marks[f"{event}.started"]
+    headers = marks.get("receive_response_headers.complete")
+    if headers is not None:
+        phases["ttfb"] = headers - marks.get("send_request_headers.started", headers)
+        phases["download"] = finished - headers
+    return phases
+
+
+def server_time(route: Any) -> Optional[float]:
+    # the `time` field of a route dict, RouteSuccess or RouteSuccessStruct
+    value = route.get("time") if isinstance(route, dict) else getattr(route, "time", None)
+    return float(value) if value is not None else None
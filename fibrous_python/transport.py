@@ -0,0 +1,260 @@
+import time
+from http.client import responses as REASONS
+from typing import TYPE_CHECKING, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .cassette import Cassette, Exchange
+from .exceptions import DeadlineExceeded
+from .timing import record_connection_phase
+
+if TYPE_CHECKING:
+    # httpx is only needed by the async router and is imported on first use
+    import httpx
+
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+# characters of a request url, longer executeBatch requests are split,
+# well below the 8 KiB many proxies and servers accept
+DEFAULT_MAX_URL_LENGTH = 4096
+
+# seconds a call may take when neither the call nor the router sets a timeout
+DEFAULT_TIMEOUT = 30.0
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """
+    Returns the seconds left until `deadline`, a `time.monotonic()` value.
+
+
+    Args:
+        deadline (float, optional): Absolute deadline, None for no deadline.
+
+
+    Returns:
+        seconds (float, optional): Remaining budget, None without deadline.
+        Raises DeadlineExceeded once the deadline passed.
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("deadline exceeded")
+    return remaining
+
+
+def expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+class _TimedConnection:
+    # reports DNS + TCP connect time to timing.connection_phases
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        self._connected_at = time.perf_counter()
+        record_connection_phase("connect", self._connected_at - started)
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+
+    def connect(self) -> None:
+        super().connect()
+        # connect() opens the socket through _new_conn, the rest is the handshake
+        record_connection_phase("tls", time.perf_counter() - self._connected_at)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose new connections report their connect and TLS time,
+    used for CallTiming.
+    """
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class CassetteAdapter(TimedHTTPAdapter):
+    """
+    HTTPAdapter recording every exchange to a Cassette, or answering from
+    it without touching the network.
+    """
+
+    def __init__(self, cassette: Cassette, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout: Any = None,
+             **kwargs: Any) -> requests.Response:
+        cassette = self.cassette
+        if cassette.recording:
+            sent = time.monotonic()
+            started = time.perf_counter()
+            response = super().send(request, stream=stream, timeout=timeout, **kwargs)
+            # reads the body here, so streamed responses report no separate download time
+            content = response.content
+            cassette.record(request.method, request.url, response.status_code, response.headers.items(),
+                            content, sent, time.perf_counter() - started)
+            return response
+
+        exchange = cassette.play(request.method, request.url)
+        if cassette.realtime and exchange.duration > 0:
+            limit = timeout[1] if isinstance(timeout, tuple) else timeout
+            if limit is not None and exchange.duration > limit:
+                time.sleep(limit)
+                raise requests.ReadTimeout(f"replayed response took {exchange.duration:.3f}s",
+                                           request=request)
+            time.sleep(exchange.duration)
+        return _replayed_response(request, exchange)
+
+
+def _replayed_response(request: requests.PreparedRequest, exchange: Exchange) -> requests.Response:
+    response = requests.Response()
+    response.status_code = exchange.status
+    response.reason = REASONS.get(exchange.status, "")
+    response.headers = CaseInsensitiveDict(exchange.headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response._content = exchange.body
+    response._content_consumed = True
+    return response
+
+
+class CassetteTransport:
+    """
+    httpx transport recording every exchange to a Cassette through the
+    wrapped transport, or answering from the cassette without touching the
+    network.
+    """
+
+    def __init__(self, cassette: Cassette, transport: Any):
+        self.cassette = cassette
+        self._transport = transport
+
+    async def handle_async_request(self, request: "httpx.Request") -> "httpx.Response":
+        import asyncio
+        import httpx
+
+        cassette = self.cassette
+        if cassette.recording:
+            sent = time.monotonic()
+            started = time.perf_counter()
+            response = await self._transport.handle_async_request(request)
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+            cassette.record(request.method, str(request.url), response.status_code,
+                            response.headers.multi_items(), content, sent, time.perf_counter() - started)
+            # the body is decoded already
+            headers = [(name, value) for name, value in response.headers.multi_items()
+                       if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+            return httpx.Response(response.status_code, headers=headers, content=content,
+                                  extensions=response.extensions)
+
+        exchange = cassette.play(request.method, str(request.url))
+        if cassette.realtime and exchange.duration > 0:
+            # calls are bounded by the router with asyncio timeouts, which cancel this sleep
+            await asyncio.sleep(exchange.duration)
+        return httpx.Response(exchange.status, headers=exchange.headers, content=exchange.body)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    async def __aenter__(self) -> "CassetteTransport":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+def build_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                  pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                  pool_block: bool = False,
+                  keep_alive: bool = True,
+                  cassette: Optional[Cassette] = None) -> requests.Session:
+    """
+    Creates a pooled requests session.
+
+
+    Args:
+        pool_connections (int): Number of per-host connection pools to keep.
+        pool_maxsize (int): Maximum connections kept open per host.
+        pool_block (bool): Block when a host pool is exhausted instead of
+            opening extra connections that are discarded afterwards.
+        keep_alive (bool): Reuse connections between requests.
+        cassette (Cassette, optional): Records or replays the traffic.
+
+
+    Returns:
+        session (requests.Session): Session with the pooled adapter mounted.
+    """
+    session = requests.Session()
+    pool = dict(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    adapter = CassetteAdapter(cassette, **pool) if cassette is not None else TimedHTTPAdapter(**pool)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def build_async_client(pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                       keep_alive: bool = True,
+                       keepalive_expiry: float = 5.0,
+                       cassette: Optional[Cassette] = None) -> "httpx.AsyncClient":
+    """
+    Creates a pooled non-blocking httpx client. Requires the optional `httpx`
+    dependency (`pip install fibrous-python[async]`).
+
+
+    Args:
+        pool_maxsize (int): Maximum open connections of the client. One
+            client is created per host, so this is the per-host limit.
+        keep_alive (bool): Reuse connections between requests.
+        keepalive_expiry (float): Seconds an idle connection is kept open.
+        cassette (Cassette, optional): Records or replays the traffic.
+
+
+    Returns:
+        client (httpx.AsyncClient): Pooled async client.
+    """
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError("AsyncFibrousRouter requires httpx, "
+                          "install it with `pip install fibrous-python[async]`") from e
+
+    limits = httpx.Limits(max_connections=pool_maxsize,
+                          max_keepalive_connections=pool_maxsize if keep_alive else 0,
+                          keepalive_expiry=keepalive_expiry)
+    if cassette is not None:
+        transport = CassetteTransport(cassette, httpx.AsyncHTTPTransport(limits=limits))
+        return httpx.AsyncClient(transport=transport, timeout=None)
+    return httpx.AsyncClient(limits=limits, timeout=None)
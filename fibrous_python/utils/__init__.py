@@ -1,2 +1,32 @@
-from .approve_helper import *
+import importlib as _importlib
+
 from .route_helper import *
+from .contract_registry import *
+from .allowance import *
+from .calldata import *
+from .token_index import *
+from .curve import *
+from .submission import *
+
+# starknet_py is only needed by the Starknet helpers and is imported on
+# first use
+_LAZY_ATTRIBUTES = {
+    "build_approve_call": ".approve_helper",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        module = _importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+# star imports resolve the lazy helpers as well, as they did before
+__all__ = [name for name in globals() if not name.startswith("_")] + list(_LAZY_ATTRIBUTES)
@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from web3 import Web3
+    from .contract_registry import ContractRegistry
+
+
+# keccak("allowance(address,address)")[:4]
+ALLOWANCE_SELECTOR = bytes.fromhex("dd62ed3e")
+
+
+class AllowanceCache:
+    """
+    Last known ERC-20 allowances per (owner, token, spender). Pass one as
+    `allowance_cache` to a router to skip allowance reads in
+    `build_approve_evm`.
+
+    Entries are written when an allowance is read or an approval is
+    confirmed, and must be invalidated when the spender uses the allowance
+    (SwapPipeline does so for every swap it sends), since the remaining
+    amount is only known on chain. Entries also expire after `ttl` seconds,
+    which bounds how long spends made by other means go unnoticed.
+
+
+    Args:
+        ttl (float, optional): Seconds an entry is trusted, None for ever.
+    """
+
+    def __init__(self, ttl: Optional[float] = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (timestamp, amount)
+        self._allowances: Dict[Tuple[str, str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(owner: str, token: str, spender: str) -> Tuple[str, str, str]:
+        return owner.lower(), token.lower(), spender.lower()
+
+    def get(self, owner: str, token: str, spender: str) -> Optional[int]:
+        entry = self._allowances.get(self._key(owner, token, spender))
+        if entry is None:
+            return None
+        timestamp, amount = entry
+        if self.ttl is not None and self._clock() - timestamp > self.ttl:
+            return None
+        return amount
+
+    def set(self, owner: str, token: str, spender: str, amount: int) -> None:
+        with self._lock:
+            self._allowances[self._key(owner, token, spender)] = (self._clock(), amount)
+
+    def invalidate(self, owner: Optional[str] = None, token: Optional[str] = None,
+                   spender: Optional[str] = None) -> None:
+        """
+        Drops matching entries. Without arguments the whole cache is cleared.
+        """
+        match = tuple(v.lower() if v is not None else None for v in (owner, token, spender))
+        with self._lock:
+            for key in list(self._allowances):
+                if all(m is None or m == k for m, k in zip(match, key)):
+                    del self._allowances[key]
+
+    def record_spend(self, owner: str, token: str, spender: str) -> None:
+        """
+        Invalidates an allowance after `spender` used it.
+        """
+        self.invalidate(owner, token, spender)
+
+
+def get_allowances(w3: "Web3", owner: str, token_addresses: Iterable[str], spender: str,
+                   registry: "ContractRegistry", multicall_address: Optional[str] = None) -> Dict[str, Optional[int]]:
+    """
+    Reads the allowance of many tokens with a single Multicall3 `eth_call`.
+
+
+    Args:
+        w3 (Web3): Web3 instance of the chain.
+        owner (str): Token owner.
+        token_addresses (Iterable[str]): ERC-20 tokens to check.
+        spender (str): Allowed spender, usually the Fibrous router.
+        registry (ContractRegistry): Registry used to build the Multicall3 contract.
+        multicall_address (str, optional): Multicall3 deployment, defaults to
+            the canonical address. Override it on local dev chains.
+
+
+    Returns:
+        allowances (Dict[str, Optional[int]]): Allowance per token address as
+        given, None for tokens whose call reverted.
+    """
+    from eth_abi import encode
+    from web3 import Web3
+    from ..models.multicall3ABI import multicall3ABI, MULTICALL3_ADDRESS
+
+    tokens: List[str] = list(token_addresses)
+    if not tokens:
+        return {}
+
+    # owner and spender are the same for every token, so is the calldata
+    call_data = ALLOWANCE_SELECTOR + encode(["address", "address"],
+                                            [Web3.to_checksum_address(owner),
+                                             Web3.to_checksum_address(spender)])
+    calls = [(Web3.to_checksum_address(token), True, call_data) for token in tokens]
+
+    multicall = registry.contract_for(w3, multicall_address or MULTICALL3_ADDRESS, multicall3ABI)
+    results = multicall.functions.aggregate3(calls).call()
+
+    return {
+        token: int.from_bytes(data, "big") if success and len(data) == 32 else None
+        for token, (success, data) in zip(tokens, results)
+    }
@@ -1,6 +1,8 @@
 from starknet_py.hash.selector import get_selector_from_name
 from starknet_py.net.client_models import Call
 
+from .calldata import split_u256
+
 def build_approve_call(token_address: str, amount: int) -> Call:
     """
     Creates an approve call to approve tokens.
@@ -20,7 +22,7 @@ def build_approve_call(token_address: str, amount: int) -> Call:
         calldata=[
             # spender -> fibrous router
             0x00f6f4CF62E3C010E0aC2451cC7807b5eEc19a40b0FaaCd00CCA3914280FDf5a,
-            amount,
-            0x0
+            # amount as u256 (low, high)
+            *split_u256(amount)
     ])
     return approve_call
@@ -0,0 +1,25 @@
+from typing import Tuple
+
+U128_MASK = (1 << 128) - 1
+
+
+def split_u256(value: int) -> Tuple[int, int]:
+    """
+    Splits a u256 into the (low, high) felt pair Cairo expects.
+
+
+    Args:
+        value (int): Unsigned 256 bit integer.
+    Returns:
+        (low, high): Lower and upper 128 bits.
+    """
+    if value < 0 or value >> 256:
+        raise ValueError(f"{value} does not fit in a u256")
+    return value & U128_MASK, value >> 128
+
+
+def join_u256(low: int, high: int) -> int:
+    """
+    Joins a (low, high) felt pair back into a u256.
+    """
+    return (high << 128) | low
@@ -0,0 +1,83 @@
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from web3 import Web3
+    from web3.contract import Contract
+
+
+_CACHE_ATTRIBUTE = "_fibrous_contracts"
+
+
+class ContractRegistry:
+    """
+    Reuses Web3 providers and parsed contracts.
+
+    Providers are kept per (chain, rpc_url), so their HTTP session is shared
+    by every contract on that endpoint. Contract factories (the parsed ABI)
+    are built once per Web3 instance and ABI, and contract instances once per
+    address. For Web3 instances owned by the caller the cache is stored on the
+    instance itself, so it is collected together with it (a registry side
+    mapping would keep it alive, since every contract references its Web3).
+
+    ABIs are identified by object identity, pass the module level ABI
+    constants rather than copies.
+    """
+
+    def __init__(self):
+        self._providers: Dict[Tuple[str, str], "Web3"] = {}
+        self._lock = threading.Lock()
+
+    def web3(self, chain_name: str, rpc_url: str) -> "Web3":
+        """
+        Returns the shared Web3 instance of an RPC endpoint.
+
+
+        Args:
+            chain_name (str): Chain of the endpoint.
+            rpc_url (str): HTTP RPC url.
+
+
+        Returns:
+            w3 (Web3): Web3 instance with an HTTP provider.
+        """
+        key = (chain_name, rpc_url)
+        w3 = self._providers.get(key)
+        if w3 is None:
+            from web3 import Web3
+
+            with self._lock:
+                w3 = self._providers.get(key)
+                if w3 is None:
+                    w3 = Web3(Web3.HTTPProvider(rpc_url))
+                    self._providers[key] = w3
+        return w3
+
+    def contract(self, chain_name: str, rpc_url: str, address: str, abi: List[Dict[str, Any]]) -> "Contract":
+        """
+        Returns the cached contract at `address` on an RPC endpoint.
+        """
+        return self.contract_for(self.web3(chain_name, rpc_url), address, abi)
+
+    def contract_for(self, w3: "Web3", address: str, abi: List[Dict[str, Any]]) -> "Contract":
+        """
+        Returns the cached contract at `address` bound to a caller owned Web3
+        instance.
+        """
+        key = (id(abi), address.lower())
+        with self._lock:
+            # {(id(abi), address): contract}, address None for the factory
+            contracts: Dict[Tuple[int, Any], Any] = w3.__dict__.setdefault(_CACHE_ATTRIBUTE, {})
+            contract = contracts.get(key)
+            if contract is None:
+                from web3 import Web3
+
+                factory = contracts.get((id(abi), None))
+                if factory is None:
+                    factory = contracts[(id(abi), None)] = w3.eth.contract(abi=abi)
+                contract = contracts[key] = factory(address=Web3.to_checksum_address(address))
+        return contract
+
+    def clear(self) -> None:
+        with self._lock:
+            self._providers.clear()
@@ -0,0 +1,142 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..models import CurvePoint, QuoteCurve, QuoteResult
+
+
+def token_price(amount: int, output_amount: int, input_decimals: int, output_decimals: int) -> float:
+    """
+    Returns output tokens per input token for raw amounts.
+    """
+    # int true division is correctly rounded, even for amounts beyond 2**53
+    return output_amount * 10 ** input_decimals / (amount * 10 ** output_decimals)
+
+
+def build_curve(token_in_address: str, token_out_address: str, chain_name: str,
+                results: Iterable[QuoteResult]) -> QuoteCurve:
+    """
+    Builds a price-impact curve from quotes of one pair at different amounts.
+
+
+    Args:
+        token_in_address (str): Input token of every quote.
+        token_out_address (str): Output token of every quote.
+        chain_name (str): Chain of the pair.
+        results (Iterable[QuoteResult]): get_best_routes results, in any order.
+
+
+    Returns:
+        curve (QuoteCurve): Successful quotes as points sorted by amount,
+        the others in `failed`. The price of the smallest amount is the
+        reference for `impact`.
+    """
+    results = list(results)
+    quoted: List[QuoteResult] = []
+    failed: List[QuoteResult] = []
+    for result in results:
+        if result.ok and result.route.get("success"):
+            quoted.append(result)
+        else:
+            failed.append(result)
+    quoted.sort(key=lambda result: result.request.amount)
+
+    points: List[CurvePoint] = []
+    reference: Optional[float] = None
+    previous_amount = previous_output = 0
+    for result in quoted:
+        route: Dict[str, Any] = result.route
+        amount = result.request.amount
+        if amount <= previous_amount:
+            # same amount quoted twice
+            continue
+        output_amount = int(route["outputAmount"])
+        decimals = route["inputToken"]["decimals"], route["outputToken"]["decimals"]
+
+        price = token_price(amount, output_amount, *decimals)
+        if reference is None:
+            reference = price
+        marginal_price = token_price(amount - previous_amount, output_amount - previous_output, *decimals)
+
+        points.append(CurvePoint(amount=amount,
+                                 output_amount=output_amount,
+                                 price=price,
+                                 marginal_price=marginal_price,
+                                 impact=price / reference - 1 if reference else float("nan"),
+                                 route=route))
+        previous_amount, previous_output = amount, output_amount
+
+    return QuoteCurve(token_in_address=token_in_address,
+                      token_out_address=token_out_address,
+                      chain_name=chain_name,
+                      reference_price=reference,
+                      points=points,
+                      failed=failed,
+                      requests=len(results))
+
+
+class ImpactSearch:
+    """
+    Finds the largest amount whose price stays within `max_impact` of the
+    price at `min_amount`, by bisecting in log space.
+
+    The routers drive it: quote `next_amounts()` concurrently, pass the
+    results to `add`, repeat until `done`. With `probes=1` every round is a
+    plain bisection, the fewest requests; more probes per round split the
+    bracket into more parts and trade requests for round trips. Impact is
+    assumed to grow with the amount, a failed quote counts as out of range.
+    """
+
+    def __init__(self, token_in_address: str, token_out_address: str, chain_name: str,
+                 max_impact: float, min_amount: int, max_amount: int,
+                 tolerance: float = 0.01, probes: int = 1, max_requests: int = 32):
+        if not 0 < min_amount < max_amount:
+            raise ValueError("min_amount must be positive and below max_amount")
+        if probes < 1:
+            raise ValueError("probes must be at least 1")
+        if max_requests < 2:
+            raise ValueError("max_requests must be at least 2")
+        self.token_in_address = token_in_address
+        self.token_out_address = token_out_address
+        self.chain_name = chain_name
+        self.max_impact = max_impact
+        self.min_amount = min_amount
+        self.tolerance = tolerance
+        self.probes = probes
+        self.max_requests = max_requests
+        self.results: List[QuoteResult] = []
+        self.done = False
+        self._low: Optional[int] = None
+        # the first round quotes both ends of the range
+        self._pending: List[int] = [min_amount, max_amount]
+
+    def next_amounts(self) -> List[int]:
+        return self._pending[:max(self.max_requests - len(self.results), 0)]
+
+    def add(self, results: Iterable[QuoteResult]) -> None:
+        self.results.extend(results)
+        curve = self.curve()
+        within = {point.amount for point in curve.points if point.impact >= -self.max_impact}
+        if self.min_amount not in within:
+            # nothing to compare against
+            self._low, self.done = None, True
+            return
+
+        out_of_range = [r.request.amount for r in self.results if r.request.amount not in within]
+        high = min(out_of_range, default=None)
+        low = self._low = max(amount for amount in within if high is None or amount < high)
+        if high is None or high <= low * (1 + self.tolerance) or len(self.results) >= self.max_requests:
+            self.done = True
+            return
+
+        ratio = high / low
+        amounts = {int(low * ratio ** (i / (self.probes + 1))) for i in range(1, self.probes + 1)}
+        self._pending = sorted(amount for amount in amounts if low < amount < high)
+        self.done = not self._pending
+
+    def curve(self) -> QuoteCurve:
+        """
+        Returns every quote made so far as a curve, with `best` set to the
+        largest amount found within the threshold.
+        """
+        curve = build_curve(self.token_in_address, self.token_out_address, self.chain_name, self.results)
+        curve.best = next((point for point in curve.points if point.amount == self._low), None)
+        return curve
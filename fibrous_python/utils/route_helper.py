@@ -1,7 +1,11 @@
-from typing import List, Union
+from decimal import Decimal, localcontext
+from typing import Any, Dict, Iterable, List, Tuple, Union
 from urllib.parse import urlencode
 
-from ..models import Slippage, RouteParams, RouteExecuteParams, RouteSuccess
+from ..models import Slippage, SlippageBatch, RouteParams, RouteExecuteParams, RouteSuccess
+
+# enough digits for a u256 amount times a price without rounding
+EXACT_PRECISION = 120
 
 
 def calculate_slippage(data: RouteSuccess) -> Slippage:
@@ -29,6 +33,146 @@ def calculate_slippage(data: RouteSuccess) -> Slippage:
                     slippage=slip_rate)
 
 
+def _quote_columns(quotes: Iterable[Any]) -> Tuple[list, list, list, list, list, list]:
+    # amounts, decimals and prices of every quote, column wise
+    in_amounts, in_decimals, in_prices = [], [], []
+    out_amounts, out_decimals, out_prices = [], [], []
+    for quote in quotes:
+        if isinstance(quote, dict):
+            token_in, token_out = quote["inputToken"], quote["outputToken"]
+            in_amounts.append(quote["inputAmount"])
+            out_amounts.append(quote["outputAmount"])
+            in_decimals.append(token_in["decimals"])
+            out_decimals.append(token_out["decimals"])
+            in_prices.append(token_in["price"])
+            out_prices.append(token_out["price"])
+        else:
+            token_in, token_out = quote.inputToken, quote.outputToken
+            in_amounts.append(quote.inputAmount)
+            out_amounts.append(quote.outputAmount)
+            in_decimals.append(token_in.decimals)
+            out_decimals.append(token_out.decimals)
+            in_prices.append(token_in.price)
+            out_prices.append(token_out.price)
+    return in_amounts, in_decimals, in_prices, out_amounts, out_decimals, out_prices
+
+
+def _exact_value(amount: Union[str, int], decimals: int, price: Union[str, float]) -> Decimal:
+    # str() keeps float prices at their shortest repr instead of the binary expansion
+    return Decimal(amount).scaleb(-decimals) * Decimal(price if isinstance(price, str) else str(price))
+
+
+def calculate_slippage_batch(quotes: Iterable[Any], exact: bool = False) -> SlippageBatch:
+    """
+    Calculates expected slippage of many quotes at once. Vectorized
+    equivalent of `calculate_slippage`, requires numpy
+    (`pip install fibrous-python[numpy]`).
+
+
+    Args:
+        quotes: RouteSuccess, RouteSuccessStruct or /route response dicts,
+            may be mixed.
+        exact (bool): Compute with Decimal instead of float64. Float values
+            carry about 16 significant digits, so large 18 decimal amounts
+            lose their low digits; exact mode keeps every digit at the cost
+            of speed. Arrays then hold Decimal objects.
+
+
+    Returns:
+        slippage (SlippageBatch): input_token_value, output_token_value and
+        slippage arrays in quote order. Slippage is NaN where the input
+        value is zero.
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("batch slippage requires numpy, "
+                          "install it with `pip install fibrous-python[numpy]`") from e
+
+    in_amounts, in_decimals, in_prices, out_amounts, out_decimals, out_prices = _quote_columns(quotes)
+
+    if exact:
+        with localcontext() as ctx:
+            ctx.prec = EXACT_PRECISION
+            input_values = np.array(list(map(_exact_value, in_amounts, in_decimals, in_prices)),
+                                    dtype=object)
+            output_values = np.array(list(map(_exact_value, out_amounts, out_decimals, out_prices)),
+                                     dtype=object)
+            nan = Decimal("NaN")
+            slippage = np.array([(o - i) / i if i else nan for i, o in zip(input_values, output_values)],
+                                dtype=object)
+        return SlippageBatch(input_values, output_values, slippage)
+
+    input_values = (np.array(in_amounts, dtype=np.float64)
+                    / np.power(10.0, np.array(in_decimals, dtype=np.float64))
+                    * np.array(in_prices, dtype=np.float64))
+    output_values = (np.array(out_amounts, dtype=np.float64)
+                     / np.power(10.0, np.array(out_decimals, dtype=np.float64))
+                     * np.array(out_prices, dtype=np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slippage = np.where(input_values != 0, (output_values - input_values) / input_values, np.nan)
+    return SlippageBatch(input_values, output_values, slippage)
+
+
+def parse_route(data: Union[bytes, str, Dict[str, Any]], mode: str = "strict") -> Any:
+    """
+    Builds a typed route from a /route response.
+
+
+    Args:
+        data: Response body or the already decoded dict.
+        mode (str): "strict" validates into a pydantic RouteSuccess, use it
+            while debugging. "fast" decodes into slotted RouteSuccessStruct
+            objects with msgspec (`pip install fibrous-python[fast]`), several
+            times cheaper and meant for trusted responses.
+
+
+    Returns:
+        route (RouteSuccess, RouteSuccessStruct): Typed route.
+    """
+    if mode == "strict":
+        if isinstance(data, (bytes, str)):
+            return RouteSuccess.model_validate_json(data)
+        return RouteSuccess.model_validate(data)
+    elif mode == "fast":
+        try:
+            import msgspec
+            from ..models.structs import RouteSuccessStruct, route_success_decoder
+        except ImportError as e:
+            raise ImportError("fast route parsing requires msgspec, "
+                              "install it with `pip install fibrous-python[fast]`") from e
+        if isinstance(data, (bytes, str)):
+            return route_success_decoder.decode(data)
+        return msgspec.convert(data, RouteSuccessStruct)
+    else:
+        raise ValueError(f"Invalid parse mode {mode!r}, expected 'strict' or 'fast'")
+
+
+def _query_value(value: Any) -> str:
+    # lists as comma separated values, booleans as JSON, the way the API parses them
+    if isinstance(value, (list, tuple)):
+        return ",".join(_query_value(item) for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def encode_query(params: Dict[str, Any]) -> str:
+    """
+    URL encodes API query parameters.
+
+
+    Args:
+        params (dict): Parameter values, lists are sent comma separated.
+
+
+    Returns:
+        query (str): Query string without the leading "?".
+    """
+    # commas are left as is, batch urls are mostly separators
+    return urlencode([(key, _query_value(value)) for key, value in params.items()], safe=",")
+
+
 def build_route_url(url: str, route_params: RouteParams | RouteExecuteParams) -> str:
     """
     Makes route params to url encoded.
@@ -42,7 +186,7 @@ def build_route_url(url: str, route_params: RouteParams | RouteExecuteParams) ->
         url (str): API query url.
 
     """
-    params = urlencode(route_params.__dict__)
+    params = encode_query(route_params.__dict__)
     return f"{url}?{params}"
 
 
@@ -58,9 +202,4 @@ def fix_calldata(calldata: List[Union[str, int]]) -> List[int]:
     Returns:
         new_calldata: Formatted calldata.
     """
-    def convert(d: Union[str, int]) -> int:
-        if isinstance(d, str):
-            return int(d, 16) if d.startswith("0x") else int(d)
-        return d
-
-    return [convert(d) for d in calldata]
+    return [(int(d, 16) if d[:2] == "0x" else int(d)) if isinstance(d, str) else d for d in calldata]
@@ -0,0 +1,436 @@
+import heapq
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from web3 import Web3
+    from web3.contract import Contract
+    from .allowance import AllowanceCache
+
+
+# gas limit of a swap when none is given, as in the Scroll example
+DEFAULT_SWAP_GAS = 2_000_000
+
+# nodes only accept a replacement paying at least 10% more
+DEFAULT_FEE_BUMP = 1.125
+
+FEE_FIELDS = ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas")
+
+
+def _nonce_too_low(error: BaseException) -> bool:
+    # geth, erigon, anvil: "nonce too low", eth-tester: "Invalid transaction
+    # nonce: Expected 3, but got 1"
+    message = str(error).lower()
+    if "nonce too low" in message:
+        return True
+    match = re.search(r"expected (\d+), but got (\d+)", message)
+    return match is not None and int(match.group(2)) < int(match.group(1))
+
+
+class NonceManager:
+    """
+    Hands out the nonces of one account locally, so transactions can be
+    signed back to back without asking the node for the transaction count
+    each time. Thread-safe.
+
+    Nonces of transactions that never reached the node are given back with
+    `release` and handed out again before any new one, closing the gap they
+    would leave.
+
+
+    Args:
+        w3 (Web3): Web3 instance of the chain.
+        address (str): Account sending the transactions.
+    """
+
+    def __init__(self, w3: "Web3", address: str):
+        self.w3 = w3
+        self.address = address
+        self._next: Optional[int] = None
+        # released nonces below _next, a min-heap
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        """
+        Reserves the lowest unused nonce.
+        """
+        with self._lock:
+            if self._free:
+                return heapq.heappop(self._free)
+            if self._next is None:
+                self._next = self.w3.eth.get_transaction_count(self.address, "pending")
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int) -> None:
+        """
+        Gives back a reserved nonce whose transaction was not broadcast.
+        """
+        with self._lock:
+            if nonce not in self._free:
+                self._free.append(nonce)
+            # released nonces at the top are simply not handed out yet
+            while self._next is not None and self._next - 1 in self._free:
+                self._next -= 1
+                self._free.remove(self._next)
+            heapq.heapify(self._free)
+
+    def claim(self, nonce: int) -> bool:
+        """
+        Reserves a specific released nonce, False if it was handed out
+        meanwhile.
+        """
+        with self._lock:
+            if nonce not in self._free:
+                return False
+            self._free.remove(nonce)
+            heapq.heapify(self._free)
+            return True
+
+    @property
+    def gaps(self) -> List[int]:
+        """
+        Released nonces still waiting for a transaction, lowest first.
+        """
+        with self._lock:
+            return sorted(self._free)
+
+    def sync(self) -> int:
+        """
+        Reloads the next nonce from the node's pending transaction count,
+        e.g. after transactions were sent from the account by other means.
+        Released nonces below it are forgotten.
+
+
+        Returns:
+            nonce (int): Next nonce handed out.
+        """
+        count = self.w3.eth.get_transaction_count(self.address, "pending")
+        with self._lock:
+            self._next = max(count, self._next or 0)
+            self._free = [nonce for nonce in self._free if nonce >= count]
+            heapq.heapify(self._free)
+            return self._free[0] if self._free else self._next
+
+
+class SubmittedTransaction:
+    """
+    A broadcast transaction, tracked until it is mined.
+
+
+    Attributes:
+        nonce (int): Nonce of the transaction and of its replacements.
+        tx (dict): Last broadcast transaction fields.
+        tx_hash (bytes): Hash of the last broadcast version.
+        hashes (List[bytes]): Hashes of every broadcast version, the
+            original first. Any of them may be the one mined.
+        sent_at (float): `time.monotonic()` of the last broadcast.
+        replacements (int): Times the transaction was replaced or rebroadcast.
+        receipt (dict, optional): Receipt once mined.
+    """
+
+    def __init__(self, nonce: int, tx: Dict[str, Any], tx_hash: bytes, raw: Optional[bytes]):
+        self.nonce = nonce
+        self.tx = tx
+        self.tx_hash = tx_hash
+        self.hashes = [tx_hash]
+        self.raw = raw
+        self.sent_at = time.monotonic()
+        self.replacements = 0
+        self.receipt: Optional[Dict[str, Any]] = None
+
+    def __repr__(self) -> str:
+        return f"SubmittedTransaction(nonce={self.nonce}, tx_hash={self.tx_hash.hex()}, replacements={self.replacements})"
+
+
+def _abi_value(value: Any, abi: Dict[str, Any]) -> Any:
+    # API values as the ABI encoder takes them: ints for numeric strings,
+    # checksummed addresses, tuples from dicts
+    from web3 import Web3
+
+    kind = abi["type"]
+    if kind.endswith("[]"):
+        return [_abi_value(item, {**abi, "type": kind[:-2]}) for item in value]
+    if kind == "tuple":
+        if isinstance(value, dict):
+            return tuple(_abi_value(value[component["name"]], component) for component in abi["components"])
+        return tuple(_abi_value(item, component) for item, component in zip(value, abi["components"]))
+    if kind == "address":
+        return Web3.to_checksum_address(value)
+    if kind.startswith(("uint", "int")) and isinstance(value, str):
+        return int(value, 0)
+    return value
+
+
+class SwapPipeline:
+    """
+    Signs and broadcasts Scroll swaps back to back from one account, without
+    waiting for receipts. Nonces are tracked locally by a NonceManager; call
+    `reconcile` (or `wait`) from time to time to collect mined transactions,
+    rebroadcast dropped ones, speed up stuck ones and fill nonce gaps left by
+    failed broadcasts. Create it with `router.swap_pipeline(w3, "scroll")`.
+
+
+    Args:
+        contract (Contract): Fibrous router contract, see
+            `get_contract_with_account`.
+        signer (LocalAccount, optional): Account signing locally, e.g.
+            `w3.eth.account.from_key(key)`. Without it transactions are sent
+            with `eth_sendTransaction` from `w3.eth.default_account`, for
+            node managed accounts of local dev chains.
+        gas (int): Gas limit of swaps.
+        gas_price (int, optional): Legacy gas price in wei. By default fees
+            follow the node: EIP-1559 fees when blocks have a base fee.
+        stuck_after (float): Seconds after which an unmined transaction
+            blocking the account is rebroadcast or replaced.
+        fee_bump (float): Fee multiplier of replacements.
+        nonce_manager (NonceManager, optional): Share one between pipelines
+            of the same account.
+        allowances (AllowanceCache, optional): Cache whose entry for the
+            input token is invalidated by every swap, the router's own.
+    """
+
+    def __init__(self, contract: "Contract", signer: Any = None, gas: int = DEFAULT_SWAP_GAS,
+                 gas_price: Optional[int] = None, stuck_after: float = 60.0,
+                 fee_bump: float = DEFAULT_FEE_BUMP, nonce_manager: Optional[NonceManager] = None,
+                 allowances: Optional["AllowanceCache"] = None):
+        self.contract = contract
+        self.w3 = contract.w3
+        self.signer = signer
+        self.address = signer.address if signer is not None else self.w3.eth.default_account
+        self.gas = gas
+        self.gas_price = gas_price
+        self.stuck_after = stuck_after
+        self.fee_bump = fee_bump
+        self.nonces = nonce_manager or NonceManager(self.w3, self.address)
+        self.allowances = allowances
+        self._chain_id: Optional[int] = None
+        # {nonce: transaction}, broadcast and not yet mined
+        self._pending: Dict[int, SubmittedTransaction] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> List[SubmittedTransaction]:
+        with self._lock:
+            return sorted(self._pending.values(), key=lambda submitted: submitted.nonce)
+
+    def submit_swap(self, swap_call: Dict[str, Any], value: int = 0,
+                    gas: Optional[int] = None) -> SubmittedTransaction:
+        """
+        Signs and broadcasts a swap built by `build_transaction`.
+
+
+        Args:
+            swap_call (dict): `route` and `swap_parameters` of the swap.
+            value (int): Wei sent along, for swaps from the native token.
+            gas (int, optional): Gas limit, the pipeline's by default.
+
+
+        Returns:
+            submitted (SubmittedTransaction): The broadcast transaction.
+        """
+        function = self.contract.get_function_by_name("swap")
+        route_abi, parameters_abi = function.abi["inputs"]
+        call = function(_abi_value(swap_call["route"], route_abi),
+                        _abi_value(swap_call["swap_parameters"], parameters_abi))
+        # fields given explicitly, so building asks the node nothing, the
+        # nonce is set on submission and the fees are reused there
+        tx = call.build_transaction({"from": self.address, "value": value, "gas": gas or self.gas,
+                                     "nonce": 0, "chainId": self.chain_id, **self._fees()})
+        submitted = self.submit_transaction(tx)
+        if self.allowances is not None:
+            # the swap spends the router allowance of the input token
+            self.allowances.record_spend(self.address, swap_call["route"]["token_in"], self.contract.address)
+        return submitted
+
+    def submit_swaps(self, swap_calls: List[Dict[str, Any]]) -> List[SubmittedTransaction]:
+        """
+        Broadcasts swaps back to back, in order.
+        """
+        return [self.submit_swap(swap_call) for swap_call in swap_calls]
+
+    def submit_transaction(self, tx: Dict[str, Any]) -> SubmittedTransaction:
+        """
+        Signs and broadcasts any transaction of the account (e.g. an
+        approval) with the next nonce. Missing fee, chain and gas fields are
+        filled in. If the node reports the nonce as used, the nonces are
+        synced from the node and the transaction sent once more. If the
+        broadcast fails otherwise the nonce is released and the error raised.
+        """
+        tx = {"from": self.address, "chainId": self.chain_id, **tx}
+        if not any(field in tx for field in FEE_FIELDS):
+            tx.update(self._fees())
+        tx.setdefault("gas", self.gas)
+        resynced = False
+        while True:
+            nonce = tx["nonce"] = self.nonces.next()
+            try:
+                tx_hash, raw = self._broadcast(tx)
+            except Exception as e:
+                if resynced or not _nonce_too_low(e):
+                    self.nonces.release(nonce)
+                    raise
+                # the account sent transactions by other means, the nonce is spent
+                self.nonces.sync()
+                resynced = True
+                continue
+            except BaseException:
+                self.nonces.release(nonce)
+                raise
+            break
+        submitted = SubmittedTransaction(nonce, tx, tx_hash, raw)
+        with self._lock:
+            self._pending[nonce] = submitted
+        return submitted
+
+    def replace(self, nonce: int, tx: Optional[Dict[str, Any]] = None) -> SubmittedTransaction:
+        """
+        Replaces a pending transaction with one paying `fee_bump` times its
+        fees (at least the current ones): the same transaction to speed it
+        up, or `tx` at the same nonce.
+        """
+        with self._lock:
+            submitted = self._pending[nonce]
+        replacement = {**(tx or submitted.tx), "nonce": nonce, "from": self.address, "chainId": self.chain_id}
+        replacement.setdefault("gas", self.gas)
+        current = self._fees()
+        for field in FEE_FIELDS:
+            replacement.pop(field, None)
+        for field, fee in current.items():
+            previous = submitted.tx.get(field, submitted.tx.get("gasPrice", 0))
+            replacement[field] = max(fee, int(previous * self.fee_bump) + 1)
+        if "maxFeePerGas" in replacement:
+            replacement["maxFeePerGas"] = max(replacement["maxFeePerGas"], replacement["maxPriorityFeePerGas"])
+        tx_hash, raw = self._broadcast(replacement)
+        with self._lock:
+            submitted.tx, submitted.tx_hash, submitted.raw = replacement, tx_hash, raw
+            submitted.hashes.append(tx_hash)
+            submitted.sent_at = time.monotonic()
+            submitted.replacements += 1
+        return submitted
+
+    def cancel(self, nonce: int) -> SubmittedTransaction:
+        """
+        Replaces a pending transaction with an empty transfer to the account
+        itself, so the nonce is used without swapping.
+        """
+        return self.replace(nonce, {"to": self.address, "value": 0, "gas": 21000, "data": b""})
+
+    def reconcile(self) -> List[SubmittedTransaction]:
+        """
+        Checks the pending transactions against the chain once.
+
+        Mined transactions are removed and returned with their receipt.
+        Nonces released below the highest pending one are filled with empty
+        transfers, or the transactions above them would never be mined. The
+        transaction blocking the account, if unmined for `stuck_after`
+        seconds, is rebroadcast when the node dropped it and replaced with
+        higher fees otherwise.
+
+
+        Returns:
+            mined (List[SubmittedTransaction]): Transactions mined since the
+            last call, lowest nonce first.
+        """
+        from web3.exceptions import TransactionNotFound
+
+        mined_count = self.w3.eth.get_transaction_count(self.address, "latest")
+        with self._lock:
+            mined = [self._pending.pop(nonce) for nonce in sorted(self._pending) if nonce < mined_count]
+            highest = max(self._pending, default=None)
+        for submitted in mined:
+            for tx_hash in reversed(submitted.hashes):
+                try:
+                    submitted.receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+                    break
+                except TransactionNotFound:
+                    # a replaced version, or a transaction sent by other means
+                    continue
+
+        if highest is None:
+            # nothing in flight, pick up transactions sent by other means
+            self.nonces.sync()
+            return mined
+
+        for nonce in self.nonces.gaps:
+            if mined_count <= nonce < highest:
+                self._fill_gap(nonce)
+
+        with self._lock:
+            blocking = self._pending.get(mined_count)
+        if blocking is not None and time.monotonic() - blocking.sent_at >= self.stuck_after:
+            try:
+                self.w3.eth.get_transaction(blocking.tx_hash)
+            except TransactionNotFound:
+                self._rebroadcast(blocking)
+            else:
+                self.replace(blocking.nonce)
+        return mined
+
+    def wait(self, timeout: float = 120.0, poll_interval: float = 1.0) -> List[SubmittedTransaction]:
+        """
+        Reconciles until every pending transaction is mined.
+
+
+        Returns:
+            mined (List[SubmittedTransaction]): Transactions mined meanwhile.
+            Raises TimeoutError if some are still pending after `timeout`
+            seconds.
+        """
+        deadline = time.monotonic() + timeout
+        mined = self.reconcile()
+        while self.pending:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{len(self.pending)} transactions still pending")
+            time.sleep(poll_interval)
+            mined += self.reconcile()
+        return mined
+
+    @property
+    def chain_id(self) -> int:
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+
+    def _fees(self) -> Dict[str, int]:
+        if self.gas_price is not None:
+            return {"gasPrice": self.gas_price}
+        base_fee = self.w3.eth.get_block("latest").get("baseFeePerGas")
+        if base_fee is None:
+            return {"gasPrice": self.w3.eth.gas_price}
+        priority_fee = self.w3.eth.max_priority_fee
+        return {"maxFeePerGas": 2 * base_fee + priority_fee, "maxPriorityFeePerGas": priority_fee}
+
+    def _broadcast(self, tx: Dict[str, Any]) -> Tuple[bytes, Optional[bytes]]:
+        if self.signer is None:
+            return bytes(self.w3.eth.send_transaction(tx)), None
+        signed = self.signer.sign_transaction({key: value for key, value in tx.items() if key != "from"})
+        raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+        return bytes(self.w3.eth.send_raw_transaction(raw)), raw
+
+    def _rebroadcast(self, submitted: SubmittedTransaction) -> None:
+        # the node lost the transaction, the same signed bytes are still valid
+        if submitted.raw is not None:
+            self.w3.eth.send_raw_transaction(submitted.raw)
+        else:
+            self.w3.eth.send_transaction(submitted.tx)
+        with self._lock:
+            submitted.sent_at = time.monotonic()
+            submitted.replacements += 1
+
+    def _fill_gap(self, nonce: int) -> None:
+        tx = {"to": self.address, "value": 0, "gas": 21000, "data": b"", "nonce": nonce,
+              "from": self.address, "chainId": self.chain_id, **self._fees()}
+        if not self.nonces.claim(nonce):
+            return
+        try:
+            tx_hash, raw = self._broadcast(tx)
+        except BaseException:
+            self.nonces.release(nonce)
+            raise
+        with self._lock:
+            self._pending[nonce] = SubmittedTransaction(nonce, tx, tx_hash, raw)
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+Token = Dict[str, Any]
+
+
+def normalize_address(address: Union[str, int], chain_name: str) -> Union[int, str]:
+    """
+    Normalizes a token address for lookups.
+
+
+    Args:
+        address (str, int): Token address as hex string (any case, with or
+            without zero padding) or, on Starknet, as felt.
+        chain_name (str): Chain of the token.
+
+
+    Returns:
+        address (int, str): Felt on Starknet, lowercase hex elsewhere.
+    """
+    if chain_name == "starknet":
+        return address if isinstance(address, int) else int(address, 16)
+    return address.lower()
+
+
+class _ChainTokens:
+    __slots__ = ("tokens", "by_address", "by_symbol", "symbol_map")
+
+    def __init__(self):
+        self.tokens: List[Token] = []
+        self.by_address: Dict[Union[int, str], Token] = {}
+        self.by_symbol: Dict[str, List[Token]] = {}
+        # {symbol.lower(): token} as returned by supported_tokens, the last
+        # token of a colliding symbol wins
+        self.symbol_map: Dict[str, Token] = {}
+
+
+class TokenIndex:
+    """
+    Token lists indexed by normalized address, by symbol and by chain.
+
+    Unlike the `{symbol: token}` dict returned by supported_tokens, tokens
+    sharing a symbol are all kept. Built once per token list refresh, all
+    lookups are O(1).
+    """
+
+    def __init__(self):
+        self._chains: Dict[str, _ChainTokens] = {}
+
+    @classmethod
+    def from_tokens(cls, chain_name: str, tokens: Iterable[Token]) -> "TokenIndex":
+        index = cls()
+        index.add(chain_name, tokens)
+        return index
+
+    def add(self, chain_name: str, tokens: Iterable[Token]) -> None:
+        """
+        Adds the token list of a chain, replacing any previous list of it.
+        """
+        entry = _ChainTokens()
+        for token in tokens:
+            symbol = token["symbol"].lower()
+            entry.tokens.append(token)
+            try:
+                address = normalize_address(token["address"], chain_name)
+            except (AttributeError, TypeError, ValueError):
+                # a malformed address in the API list, the token can still
+                # be found by symbol
+                pass
+            else:
+                entry.by_address[address] = token
+            entry.by_symbol.setdefault(symbol, []).append(token)
+            entry.symbol_map[symbol] = token
+        self._chains[chain_name] = entry
+
+    @property
+    def chains(self) -> List[str]:
+        return list(self._chains)
+
+    def by_address(self, address: Union[str, int], chain_name: str) -> Optional[Token]:
+        """
+        Returns the token at `address` on `chain_name`, or None.
+        """
+        entry = self._chains.get(chain_name)
+        if entry is None:
+            return None
+        return entry.by_address.get(normalize_address(address, chain_name))
+
+    def by_symbol(self, symbol: str, chain_name: Optional[str] = None) -> List[Token]:
+        """
+        Returns every token with `symbol` (case-insensitive), on one chain or
+        on all indexed chains.
+        """
+        symbol = symbol.lower()
+        if chain_name is not None:
+            entry = self._chains.get(chain_name)
+            return list(entry.by_symbol.get(symbol, ())) if entry is not None else []
+        return [token for entry in self._chains.values() for token in entry.by_symbol.get(symbol, ())]
+
+    def by_chain(self, chain_name: str) -> List[Token]:
+        entry = self._chains.get(chain_name)
+        return list(entry.tokens) if entry is not None else []
+
+    def symbol_map(self, chain_name: str) -> Dict[str, Token]:
+        """
+        Returns the `{symbol.lower(): token}` view of a chain, the shape
+        supported_tokens has always returned. The dict and the tokens are
+        copies, changing them leaves the index intact.
+        """
+        entry = self._chains.get(chain_name)
+        if entry is None:
+            return {}
+        return {symbol: dict(token) for symbol, token in entry.symbol_map.items()}
+
+    def __len__(self) -> int:
+        return sum(len(entry.tokens) for entry in self._chains.values())
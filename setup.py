@@ -6,12 +6,33 @@ setup(
     packages=find_packages(),
     install_requires=[
         "requests",
+        # still installed by default for this release, moves to the
+        # 'starknet' extra in the next one
         "starknet-py",
         "pydantic"
     ],
     extras_require={
+        'async': [
+            'httpx',
+        ],
+        'starknet': [
+            'starknet-py',
+        ],
+        'scroll': [
+            'web3',
+        ],
+        'fast': [
+            'msgspec',
+        ],
+        'numpy': [
+            'numpy',
+        ],
         'dev': [
             'pytest>=6.0.0',
+            # the async router and Scroll tests
+            'httpx',
+            'web3',
+            'eth-tester[py-evm]',
         ],
     },
     entry_points={
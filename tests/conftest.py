@@ -0,0 +1,84 @@
+import pytest
+
+from fibrous_python import AsyncFibrousRouter, FibrousRouter
+from fibrous_python.mock_server import MockFibrousAPI
+
+TOKEN_ADDRESS = "0x1111111111111111111111111111111111111111"
+
+# Minimal ERC-20 allowance bookkeeping, allowances stored at
+# keccak(owner, spender):
+#   allowance(owner, spender) returns the stored amount
+#   approve(spender, amount) stores amount for (caller, spender)
+#   any other call zeroes the allowance of (calldata owner, caller)
+TOKEN_CODE = bytes.fromhex(
+    "60003560e01c8063dd62ed3e1461002f578063095ea7b31461004557600435600052336020526000604060002055"
+    "005b6040600460003760406000205460005260206000f35b3360005260043560205260243560406000205560016000"
+    "5260206000f3")
+
+# Stand-in for the Fibrous router: every call (a swap) spends the whole
+# allowance its caller gave it on TOKEN_ADDRESS
+ROUTER_CODE = bytes.fromhex(
+    "33600452600060006024600060007311111111111111111111111111111111111111115af15000")
+
+
+@pytest.fixture
+def w3():
+    # a local chain with TOKEN_ADDRESS and the Scroll router in place
+    pytest.importorskip("eth_tester")
+    from eth_tester import EthereumTester, PyEVMBackend
+    from web3 import EthereumTesterProvider, Web3
+
+    state = PyEVMBackend.generate_genesis_state(num_accounts=2)
+    for address, code in ((TOKEN_ADDRESS, TOKEN_CODE), (FibrousRouter.SCROLL_ROUTER_ADDRESS, ROUTER_CODE)):
+        state[bytes.fromhex(address[2:])] = {"balance": 0, "nonce": 0, "code": code, "storage": {}}
+    w3 = Web3(EthereumTesterProvider(EthereumTester(PyEVMBackend(genesis_state=state))))
+    w3.eth.default_account = w3.eth.accounts[0]
+    return w3
+
+
+@pytest.fixture
+def token():
+    # address of the stand-in ERC-20 on the `w3` chain
+    return TOKEN_ADDRESS
+
+
+@pytest.fixture
+def api():
+    with MockFibrousAPI(tokens=20, retry_after=0) as api:
+        yield api
+
+
+@pytest.fixture
+def make_router(api):
+    # routers against the mock, closed after the test
+    routers = []
+
+    def make(**kwargs) -> FibrousRouter:
+        router = FibrousRouter(api.url, graph_url=api.url, **kwargs)
+        routers.append(router)
+        return router
+
+    yield make
+    for router in routers:
+        router.close()
+
+
+@pytest.fixture
+def router(make_router):
+    return make_router()
+
+
+@pytest.fixture
+def make_async_router(api):
+    # call within the test's event loop and close it there
+    def make(**kwargs) -> AsyncFibrousRouter:
+        return AsyncFibrousRouter(api.url, graph_url=api.url, **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def pair(api):
+    # (token_in, token_out) addresses of the mock's starknet token list
+    tokens = api.tokens["starknet"]
+    return tokens[0]["address"], tokens[1]["address"]
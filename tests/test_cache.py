@@ -0,0 +1,72 @@
+import pytest
+
+from fibrous_python import QuoteCache
+
+ETH, USDC = "0xETH", "0xUSDC"
+
+
+def bucket_edges(cache, amount):
+    # (first, last) amount of the bucket holding `amount`
+    bucket = cache._bucket(amount)
+
+    def first_above(lo, hi, inside):
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            lo, hi = (mid, hi) if inside(mid) else (lo, mid)
+        return hi
+
+    first = first_above(amount // 2, amount, lambda a: cache._bucket(a) < bucket)
+    last = first_above(amount, amount * 2, lambda a: cache._bucket(a) == bucket) - 1
+    return first, last
+
+
+def test_nearby_amounts_get_scaled_quotes():
+    cache = QuoteCache(max_age_ms=None, tolerance=0.001)
+    amount = 10 ** 18
+    first, last = bucket_edges(cache, amount)
+    # buckets are `tolerance` wide
+    assert last / first == pytest.approx(1.001, rel=1e-6)
+    cache.put("starknet", ETH, USDC, amount, None,
+              {"inputAmount": str(amount), "outputAmount": "3000000000", "success": True})
+
+    exact = cache.get("starknet", ETH, USDC, amount)
+    assert exact["outputAmount"] == "3000000000" and "approximate" not in exact
+    for nearby in (first, last):
+        route = cache.get("starknet", ETH, USDC, nearby)
+        assert route["approximate"] is True
+        assert route["inputAmount"] == str(nearby)
+        assert route["outputAmount"] == str(3000000000 * nearby // amount)
+    assert cache.get("starknet", ETH, USDC, first - 1) is None
+    assert cache.get("starknet", ETH, USDC, last + 1) is None
+    # addresses are matched case-insensitively
+    assert cache.get("starknet", ETH.lower(), USDC.upper(), last)["inputAmount"] == str(last)
+
+
+def test_reverse_quotes_are_only_reused_for_the_exact_amount():
+    cache = QuoteCache(max_age_ms=None)
+    amount = 10 ** 18
+    cache.put("starknet", ETH, USDC, amount, {"reverse": True},
+              {"inputAmount": "5", "outputAmount": str(amount), "success": True})
+    assert cache.get("starknet", ETH, USDC, amount, {"reverse": True})["inputAmount"] == "5"
+    assert cache.get("starknet", ETH, USDC, amount + 1, {"reverse": True}) is None
+    assert cache.get("starknet", ETH, USDC, amount) is None
+
+
+def test_entries_expire():
+    now = [0.0]
+    cache = QuoteCache(max_age_ms=500, clock=lambda: now[0])
+    cache.put("starknet", ETH, USDC, 100, None, {"inputAmount": "100", "outputAmount": "7"})
+    now[0] = 0.4
+    assert cache.get("starknet", ETH, USDC, 100)["outputAmount"] == "7"
+    now[0] = 0.6
+    assert cache.get("starknet", ETH, USDC, 100) is None
+
+
+def test_router_answers_nearby_amounts_from_the_cache(make_router, api, pair):
+    router = make_router(quote_cache=QuoteCache(max_age_ms=60_000))
+    amount = 10 ** 18
+    route = router.get_best_route(amount, *pair, "starknet")
+    nearby = router.get_best_route(amount + amount // 5000, *pair, "starknet")
+    assert api.requests["route"] == 1
+    assert nearby["approximate"] is True
+    assert nearby["outputAmount"] == str(int(route["outputAmount"]) * (amount + amount // 5000) // amount)
@@ -0,0 +1,22 @@
+import pytest
+
+from fibrous_python.utils import fix_calldata, split_u256, join_u256
+
+
+def test_fix_calldata():
+    assert fix_calldata(["0x1f", "1000", "0", 5, "007", "0x_1f", "1_000"]) == [31, 1000, 0, 5, 7, 31, 1000]
+    assert fix_calldata([]) == []
+
+
+@pytest.mark.parametrize("value", ["0o7", "0b1", "0X1F", "-0x5", " 0x5", "0x", "abc"])
+def test_fix_calldata_rejects_malformed_felts(value):
+    with pytest.raises(ValueError):
+        fix_calldata(["0x1", value])
+
+
+def test_u256_round_trip():
+    value = (1 << 200) + 12345
+    low, high = split_u256(value)
+    assert low < 1 << 128 and join_u256(low, high) == value
+    with pytest.raises(ValueError):
+        split_u256(1 << 256)
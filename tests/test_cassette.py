@@ -0,0 +1,66 @@
+import asyncio
+import gzip
+
+import pytest
+import requests
+
+from fibrous_python import AsyncFibrousRouter, Cassette, FibrousRouter
+from fibrous_python.transport import CassetteAdapter
+
+# nothing listens here, replayed routers must not touch the network
+OFFLINE_URL = "http://127.0.0.1:9"
+
+
+def replay_session(cassette):
+    session = requests.Session()
+    session.mount("http://", CassetteAdapter(cassette))
+    return session
+
+
+@pytest.mark.parametrize("name", ["traffic.jsonl", "traffic.jsonl.gz"])
+def test_record_then_replay_byte_for_byte(api, pair, tmp_path, name):
+    path = str(tmp_path / name)
+    paths = [f"/starknet/route?amount={10 ** 18 + i}&tokenInAddress={pair[0]}&tokenOutAddress={pair[1]}"
+             for i in range(20)] + ["/starknet/tokens", "/scroll/protocols"]
+    with Cassette(path, "record") as cassette:
+        session = replay_session(cassette)
+        recorded = [session.get(api.url + url).content for url in paths]
+    assert recorded == [requests.get(api.url + url).content for url in paths]
+
+    session = replay_session(Cassette(path, "fast"))
+    assert [session.get(OFFLINE_URL + url).content for url in paths] == recorded
+
+
+def test_routers_replay_recorded_traffic(make_router, api, pair, tmp_path):
+    path = str(tmp_path / "traffic.jsonl.gz")
+    with Cassette(path, "record") as cassette:
+        router = make_router(cassette=cassette)
+        route = router.get_best_route(10 ** 18, *pair, "starknet")
+        tokens = router.supported_tokens("starknet")
+    requests_made = dict(api.requests)
+
+    cassette = Cassette(path, "fast")
+    with FibrousRouter(OFFLINE_URL, graph_url=OFFLINE_URL, cassette=cassette) as router:
+        assert router.get_best_route(10 ** 18, *pair, "starknet") == route
+        assert router.supported_tokens("starknet") == tokens
+
+    async def main():
+        async with AsyncFibrousRouter(OFFLINE_URL, graph_url=OFFLINE_URL, cassette=cassette) as router:
+            return await router.get_best_route(10 ** 18, *pair, "starknet")
+
+    assert asyncio.run(main()) == route
+    assert api.requests == requests_made
+
+
+def test_gzip_cassettes_are_flushed_once(make_router, api, tmp_path):
+    # a sync flush per exchange would end a deflate block per line
+    path = str(tmp_path / "traffic.jsonl.gz")
+    with Cassette(path, "record") as cassette:
+        router = make_router(cassette=cassette)
+        for _ in range(200):
+            router.supported_protocols("starknet")
+    with gzip.open(path, "rb") as file:
+        lines = file.read()
+    assert lines.count(b"\n") == 200
+    body = requests.get(f"{api.url}/starknet/protocols").content
+    assert len(open(path, "rb").read()) < len(body) * 5
@@ -0,0 +1,71 @@
+import pytest
+
+from fibrous_python.models import QuoteRequest, QuoteResult
+from fibrous_python.utils import ImpactSearch
+
+
+def raw_amount(token, usd):
+    return int(usd / float(token["price"]) * 10 ** token["decimals"])
+
+
+def expected_max_amount(api, token, max_impact, min_usd):
+    # the mock's impact is usd / (usd + liquidity), solved for the amount
+    # whose price is `max_impact` below the price of `min_usd`
+    reference = min_usd / (min_usd + api.liquidity)
+    impact = 1 - (1 - max_impact) * (1 - reference)
+    return raw_amount(token, impact * api.liquidity / (1 - impact))
+
+
+@pytest.fixture
+def token_in(api, pair):
+    return next(token for token in api.tokens["starknet"] if token["address"] == pair[0])
+
+
+@pytest.mark.parametrize("probes", [1, 3])
+def test_search_converges_to_the_impact_threshold(router, api, pair, token_in, probes):
+    expected = expected_max_amount(api, token_in, 0.01, 1000)
+    curve = router.max_amount_within_impact(*pair, "starknet", max_impact=0.01,
+                                            min_amount=raw_amount(token_in, 1000),
+                                            max_amount=raw_amount(token_in, 10 ** 7),
+                                            tolerance=0.001, probes=probes)
+    best = curve.best
+    assert expected * 0.998 <= best.amount <= expected * 1.0001
+    assert best.impact >= -0.01
+    # bracketed by a quote just past the threshold
+    above = min(point.amount for point in curve.points if point.impact < -0.01)
+    assert best.amount < above <= best.amount * 1.001 + 1
+    assert curve.requests == api.requests["route"] <= 32
+
+
+def test_whole_range_within_the_threshold(router, api, pair, token_in):
+    max_amount = raw_amount(token_in, 10 ** 5)
+    curve = router.max_amount_within_impact(*pair, "starknet", max_impact=0.5,
+                                            min_amount=raw_amount(token_in, 1000), max_amount=max_amount)
+    assert curve.best.amount == max_amount
+    assert api.requests["route"] == 2
+
+
+def test_threshold_below_the_first_step(router, api, pair, token_in):
+    min_amount = raw_amount(token_in, 1000)
+    curve = router.max_amount_within_impact(*pair, "starknet", max_impact=1e-9, min_amount=min_amount,
+                                            max_amount=raw_amount(token_in, 10 ** 7), tolerance=0.01)
+    assert min_amount <= curve.best.amount <= min_amount * 1.01
+
+
+def test_request_budget_stops_the_search(router, api, pair, token_in):
+    curve = router.max_amount_within_impact(*pair, "starknet", max_impact=0.01,
+                                            min_amount=raw_amount(token_in, 1000),
+                                            max_amount=raw_amount(token_in, 10 ** 7),
+                                            tolerance=1e-9, max_requests=5)
+    assert api.requests["route"] == 5
+    assert curve.best.impact >= -0.01
+
+
+def test_unquotable_reference_amount():
+    search = ImpactSearch("0xa", "0xb", "starknet", 0.01, 100, 10 ** 6)
+    requests = [QuoteRequest(amount=amount, token_in_address="0xa", token_out_address="0xb", chain_name="starknet")
+                for amount in search.next_amounts()]
+    search.add([QuoteResult(index=0, request=requests[0], error=ValueError("no route")),
+                QuoteResult(index=1, request=requests[1], route={"success": False})])
+    assert search.done
+    assert search.curve().best is None
@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+
+
+def test_star_import_exports_lazy_helpers():
+    namespace = {}
+    exec("from fibrous_python import *", namespace)
+    for name in ("FibrousRouter", "fix_calldata", "build_approve_call", "erc20ABI", "fibrousRouterABI"):
+        assert name in namespace
+    assert isinstance(namespace["erc20ABI"], list)
+
+    namespace = {}
+    exec("from fibrous_python.utils import *", namespace)
+    assert "build_approve_call" in namespace
+
+
+def test_lazy_helpers_are_listed_by_dir():
+    import fibrous_python
+
+    assert {"build_approve_call", "erc20ABI", "fibrousRouterABI"} <= set(dir(fibrous_python))
+    assert "build_approve_call" in dir(fibrous_python.utils)
+
+
+def test_import_does_not_load_chain_libraries():
+    probe = "import json, sys, fibrous_python; print(json.dumps(sorted(sys.modules)))"
+    modules = json.loads(subprocess.run([sys.executable, "-c", probe], check=True,
+                                        capture_output=True, text=True).stdout)
+    for module in ("web3", "starknet_py", "fibrous_python.models.erc20ABI", "fibrous_python.utils.approve_helper"):
+        assert module not in modules
+
+
+def test_abi_submodules_do_not_shadow_the_abis(monkeypatch, w3, token):
+    import fibrous_python.models as models
+    from fibrous_python import FibrousRouter
+
+    # import the ABI modules directly before anything else reads the ABIs,
+    # as the first import of a fresh process would
+    for name in ("erc20ABI", "fibrousRouterABI"):
+        monkeypatch.delitem(sys.modules, f"fibrous_python.models.{name}")
+        monkeypatch.delitem(vars(models), name, raising=False)
+    from fibrous_python.models.erc20ABI import erc20ABI
+    from fibrous_python.models.fibrousRouterABI import fibrousRouterABI
+
+    assert models.erc20ABI is erc20ABI
+    assert models.fibrousRouterABI is fibrousRouterABI
+    router = FibrousRouter()
+    assert router.build_approve_evm(100, token, w3, "scroll")
+    assert router.get_contract_with_account(w3, "scroll").abi == fibrousRouterABI
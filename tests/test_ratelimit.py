@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from fibrous_python import RateLimit
+from fibrous_python.ratelimit import RateLimiter, parse_retry_after
+
+
+def test_aimd_limit_halves_on_429_and_grows_back():
+    now = [0.0]
+    limiter = RateLimiter(RateLimit(max_concurrency=8, backoff=0), clock=lambda: now[0])
+
+    first, second = limiter.acquire(), limiter.acquire()
+    now[0] = 1.0
+    limiter.release(first, 429)
+    assert limiter.concurrency.limit == 4
+    # started before the decrease, the same burst of 429s
+    limiter.release(second, 429)
+    assert limiter.concurrency.limit == 4
+
+    limiter.release(limiter.acquire(), 503)
+    assert limiter.concurrency.limit == 2
+    # one per `limit` successes
+    for _ in range(2):
+        limiter.release(limiter.acquire(), 200)
+    assert limiter.concurrency.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    for _ in range(100):
+        limiter.release(limiter.acquire(), 200)
+    assert limiter.concurrency.limit == 8
+
+
+def test_router_limit_shrinks_on_429_and_recovers(make_router, api, pair):
+    router = make_router(rate_limits={"route": RateLimit(max_concurrency=8, max_retries=0, backoff=0)})
+    concurrency = router._limiters["route"].concurrency
+    api.error_rate, api.error_status = 1.0, 429
+    with pytest.raises(requests.HTTPError):
+        router.get_best_route(10 ** 18, *pair, "starknet")
+    assert concurrency.limit == 4
+
+    api.error_rate = 0.0
+    for _ in range(4):
+        router.get_best_route(10 ** 18, *pair, "starknet")
+    assert 4.9 < concurrency.limit < 5
+
+
+def test_retry_after_pauses_every_caller(make_router, api, pair):
+    router = make_router(rate_limits={"route": RateLimit(max_retries=0)})
+    api.error_rate, api.error_status, api.retry_after = 1.0, 429, 0.5
+    paused = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        router.get_best_route(10 ** 18, *pair, "starknet")
+
+    api.error_rate = 0.0
+
+    def quote(amount):
+        route = router.get_best_route(amount, *pair, "starknet")
+        return route["success"], time.monotonic() - paused
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(quote, range(10 ** 18, 10 ** 18 + 4)))
+    assert all(success and elapsed >= 0.5 for success, elapsed in results)
+    assert api.requests["route"] == 5
+
+
+def test_429_is_retried_after_retry_after(make_router, api, pair):
+    router = make_router(rate_limits={"route": RateLimit(max_retries=1)})
+    api.error_rate, api.error_status, api.retry_after = 1.0, 429, 0.3
+    # the API recovers while the limiter waits out the Retry-After
+    threading.Timer(0.1, setattr, (api, "error_rate", 0.0)).start()
+    started = time.monotonic()
+    assert router.get_best_route(10 ** 18, *pair, "starknet")["success"]
+    assert time.monotonic() - started >= 0.3
+    assert api.requests["route"] == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
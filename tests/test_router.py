@@ -0,0 +1,321 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from fibrous_python import (DeadlineExceeded, FailoverPolicy, FibrousRouter, HedgePolicy, MetadataCache,
+                            MetricsRegistry, QuoteCache, RateLimit)
+from fibrous_python.mock_server import MockFibrousAPI
+
+
+def run_concurrently(fn, n):
+    # calls fn from n threads at once and returns the results in thread order
+    results = [None] * n
+    barrier = threading.Barrier(n)
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_get_best_route(router, api, pair):
+    route = router.get_best_route(10 ** 18, *pair, "starknet")
+    assert route["success"]
+    assert route["inputAmount"] == str(10 ** 18)
+    assert api.requests["route"] == 1
+
+
+def test_quote_cache_answers_repeated_quotes(make_router, api, pair):
+    router = make_router(quote_cache=QuoteCache(max_age_ms=60_000))
+    first = router.get_best_route(10 ** 18, *pair, "starknet")
+    second = router.get_best_route(10 ** 18, *pair, "starknet")
+    assert second == first
+    assert api.requests["route"] == 1
+
+    router.get_best_route(10 ** 18, *pair, "starknet", use_cache=False)
+    assert api.requests["route"] == 2
+
+
+def test_metadata_cache_answers_repeated_lookups(make_router, api):
+    router = make_router(metadata_cache=MetadataCache(ttl=60))
+    tokens = router.supported_tokens("starknet")
+    assert router.supported_tokens("starknet") == tokens
+    assert api.requests["tokens"] == 1
+
+    router.invalidate_metadata("starknet")
+    router.supported_tokens("starknet")
+    assert api.requests["tokens"] == 2
+
+
+def test_supported_tokens_returns_copies(make_router, api):
+    router = make_router(metadata_cache=MetadataCache(ttl=60))
+    tokens = router.supported_tokens("starknet")
+    symbol = next(iter(tokens))
+    tokens.pop(symbol)
+    assert symbol in router.supported_tokens("starknet")
+    assert api.requests["tokens"] == 1
+
+def test_single_flight_coalesces_identical_requests(router, api, pair):
+    api.latency = 0.2
+    routes = run_concurrently(lambda: router.get_best_route(10 ** 18, *pair, "starknet"), 8)
+    assert all(route == routes[0] for route in routes)
+    assert api.requests["route"] == 1
+    # every caller decodes its own copy
+    assert len({id(route) for route in routes}) == 8
+
+
+def test_single_flight_off(make_router, api, pair):
+    router = make_router(single_flight=False)
+    api.latency = 0.1
+    run_concurrently(lambda: router.get_best_route(10 ** 18, *pair, "starknet"), 4)
+    assert api.requests["route"] == 4
+
+
+def test_deadline_exceeded(router, api, pair):
+    api.latency = 0.5
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        router.get_best_route(10 ** 18, *pair, "starknet", timeout=0.1)
+    assert time.monotonic() - started < 0.4
+
+    with pytest.raises(DeadlineExceeded):
+        router.get_best_route(10 ** 18, *pair, "starknet", deadline=time.monotonic() + 0.1)
+
+
+def test_deadline_covers_a_slow_body(router, api, pair):
+    # every piece of the body arrives within the timeout, the whole body does not
+    api.body_delay = 0.6
+    with pytest.raises(DeadlineExceeded):
+        router.get_best_route(10 ** 18, *pair, "starknet", timeout=0.2)
+    with pytest.raises(DeadlineExceeded):
+        router.build_transaction(10 ** 18, *pair, 0.01, "0x1", "starknet", timeout=0.2)
+
+    api.body_delay = 0.1
+    assert router.get_best_route(10 ** 18, *pair, "starknet", timeout=1)["success"]
+
+
+def test_batch_is_split_into_chunks_in_input_order(router, api, pair):
+    amounts = list(range(10 ** 18, 10 ** 18 + 40))
+    token_in = [pair[0]] * 40
+    token_out = [pair[1]] * 40
+    urls = router._batch_transaction_urls(amounts, token_in, token_out, 0.01, "0x1", "starknet",
+                                          max_url_length=2048)
+    assert len(urls) > 1
+    assert all(len(url) <= 2048 for url in urls)
+
+    calls = router.build_batch_transaction(amounts, token_in, token_out, 0.01, "0x1", "starknet",
+                                           max_url_length=2048)
+    assert api.requests["executeBatch"] == len(urls)
+    # responses depend on the request only, so each chunk can be fetched again
+    expected = [[int(x, 0) for x in call] for url in urls for call in requests.get(url).json()]
+    assert [call["calldata"] for call in calls] == expected
+
+
+def test_empty_batch(router, make_async_router, api):
+    assert router.build_batch_transaction([], [], [], 0.01, "0x1", "starknet") == []
+
+    async def main():
+        async with make_async_router() as async_router:
+            return await async_router.build_batch_transaction([], [], [], 0.01, "0x1", "starknet")
+
+    assert asyncio.run(main()) == []
+    assert "executeBatch" not in api.requests
+
+
+def test_batch_rejects_unequal_inputs(router, pair):
+    with pytest.raises(ValueError):
+        router.build_batch_transaction([1, 2], [pair[0]], [pair[1]] * 2, 0.01, "0x1", "starknet")
+    with pytest.raises(ValueError):
+        router.build_batch_transaction([1], [pair[0]], [pair[1]], 0.01, "0x1", "scroll")
+
+
+def test_rate_limited_requests_retry_429(make_router, api, pair):
+    router = make_router(rate_limits={"route": RateLimit(max_retries=2, backoff=0)})
+    api.error_rate, api.error_status = 1.0, 429
+    with pytest.raises(requests.HTTPError) as error:
+        router.get_best_route(10 ** 18, *pair, "starknet")
+    assert error.value.response.status_code == 429
+    assert api.requests["route"] == 3
+
+    api.error_rate = 0.0
+    assert router.get_best_route(10 ** 18, *pair, "starknet")["success"]
+
+
+def test_failover_retries_route_on_fallback(api, pair):
+    with MockFibrousAPI(tokens=20, error_rate=1.0, error_status=503) as failing, \
+            FibrousRouter(failing.url, graph_url=api.url, failover=FailoverPolicy([api.url])) as router:
+        for _ in range(3):
+            assert router.get_best_route(10 ** 18, *pair, "starknet")["success"]
+        assert api.requests["route"] == 3
+        # client errors are not retried elsewhere
+        api.error_status, api.error_rate = 400, 1.0
+        with pytest.raises(requests.HTTPError):
+            router.get_best_route(10 ** 18, *pair, "starknet")
+
+
+def test_failover_breaker_half_open(api, pair):
+    policy = FailoverPolicy([api.url], failure_threshold=1, reset_timeout=0.3, probe_interval=60)
+    with MockFibrousAPI(tokens=20, error_rate=1.0, error_status=503) as failing, \
+            FibrousRouter(failing.url, graph_url=api.url, failover=policy) as router:
+        breaker = router.endpoint_pool.endpoints[0].breaker
+        quote = lambda: router.get_best_route(10 ** 18, *pair, "starknet")["success"]
+        assert quote()
+        assert breaker.state == "open" and failing.requests["route"] == 1
+        # open, every request goes to the fallback
+        assert quote() and quote()
+        assert failing.requests["route"] == 1
+
+        # one trial after the reset timeout, its failure opens the breaker again
+        time.sleep(0.35)
+        assert quote() and quote() and quote()
+        assert failing.requests["route"] == 2
+        assert breaker.state == "open"
+
+        # a successful trial closes it
+        failing.error_rate = 0.0
+        time.sleep(0.35)
+        assert quote()
+        assert failing.requests["route"] == 3
+        assert breaker.state == "closed"
+        assert api.requests["route"] == 6
+
+def test_hedge_delay_excludes_queueing(make_router, api, pair):
+    # two hedge workers for sixteen concurrent quotes, most primaries queue
+    # for longer than the hedge delay
+    metrics = MetricsRegistry()
+    router = make_router(pool_maxsize=1, metrics=metrics,
+                         hedge=HedgePolicy(max_ratio=1, min_samples=1, min_delay=0.25))
+    api.latency = 0.05
+    router.get_best_route(10 ** 18, *pair, "starknet")
+    routes = run_concurrently(lambda: router.get_best_route(
+        10 ** 18 + threading.get_ident() % 10 ** 6, *pair, "starknet"), 16)
+    assert all(route["success"] for route in routes)
+    # no attempt ran longer than the hedge delay, so nothing was hedged
+    assert metrics.hedges == {}
+
+
+def test_hedge_answers_for_a_slow_primary(make_router, api, pair):
+    metrics = MetricsRegistry()
+    router = make_router(metrics=metrics, hedge=HedgePolicy(max_ratio=1, min_samples=1, min_delay=0.2))
+    router.get_best_route(10 ** 18, *pair, "starknet")
+    # the primary is answered after 1.5s, the hedge sent at 0.2s at once
+    api.latency = 1.5
+    threading.Timer(0.1, setattr, (api, "latency", 0.0)).start()
+    started = time.monotonic()
+    route = router.get_best_route(10 ** 18, *pair, "starknet")
+    assert time.monotonic() - started < 1.0
+    assert route["success"]
+    assert metrics.hedges == {"route": 1}
+    assert api.requests["route"] == 3
+    # the call returned with the hedge, the primary is still running
+    assert metrics.responses[("route", 200)] == 2
+
+    # and finishes in the background, its answer is dropped
+    time.sleep(1.5)
+    assert metrics.responses[("route", 200)] == 3
+
+
+def test_async_hedge_cancels_the_slow_primary(make_async_router, api, pair):
+    async def main():
+        metrics = MetricsRegistry()
+        async with make_async_router(metrics=metrics,
+                                     hedge=HedgePolicy(max_ratio=1, min_samples=1, min_delay=0.2)) as router:
+            await router.get_best_route(10 ** 18, *pair, "starknet")
+            api.latency = 1.5
+            asyncio.get_running_loop().call_later(0.1, setattr, api, "latency", 0.0)
+            started = time.monotonic()
+            route = await router.get_best_route(10 ** 18, *pair, "starknet")
+            assert time.monotonic() - started < 1.0
+            assert route["success"]
+            assert metrics.hedges == {"route": 1}
+            assert api.requests["route"] == 3
+            # the losing attempt was cancelled, not left running
+            await asyncio.sleep(0)
+            assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(main())
+
+def test_async_single_flight_and_deadline(make_async_router, api, pair):
+    async def main():
+        async with make_async_router() as router:
+            api.latency = 0.2
+            routes = await asyncio.gather(*[router.get_best_route(10 ** 18, *pair, "starknet")
+                                            for _ in range(8)])
+            assert all(route == routes[0] for route in routes)
+            assert api.requests["route"] == 1
+
+            api.latency = 0.5
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceeded):
+                await router.get_best_route(2 * 10 ** 18, *pair, "starknet", timeout=0.1)
+            assert time.monotonic() - started < 0.4
+
+    asyncio.run(main())
+
+
+def test_async_batch_matches_sync(make_async_router, router, pair):
+    amounts = list(range(10 ** 18, 10 ** 18 + 40))
+    args = (amounts, [pair[0]] * 40, [pair[1]] * 40, 0.01, "0x1", "starknet")
+
+    async def main():
+        async with make_async_router() as async_router:
+            return await async_router.build_batch_transaction(*args, max_url_length=2048)
+
+    assert asyncio.run(main()) == router.build_batch_transaction(*args, max_url_length=2048)
+
+
+def test_mock_api_payloads_are_valid_json(router, api):
+    protocols = router.supported_protocols("scroll")
+    assert protocols and all(isinstance(v, int) for v in protocols.values())
+    assert json.loads(requests.get(f"{api.url}/scroll/tokens").content) == api.tokens["scroll"]
+
+
+def test_single_flight_followers_keep_their_own_deadline(router, api, pair):
+    api.latency = 0.3
+    quote = lambda timeout: router.get_best_route(10 ** 18, *pair, "starknet", timeout=timeout)
+    results = [None, None]
+
+    def leader():
+        try:
+            results[0] = quote(0.1)
+        except Exception as e:
+            results[0] = e
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    time.sleep(0.02)
+    # joins the leader's call, then sends its own once that runs out of time
+    results[1] = quote(5)
+    thread.join()
+    assert isinstance(results[0], DeadlineExceeded)
+    assert results[1]["success"]
+    assert api.requests["route"] == 2
+
+
+def test_async_single_flight_followers_keep_their_own_deadline(make_async_router, api, pair):
+    async def main():
+        async with make_async_router() as router:
+            api.latency = 0.3
+            quote = lambda timeout: router.get_best_route(10 ** 18, *pair, "starknet", timeout=timeout)
+            leader = asyncio.ensure_future(quote(0.1))
+            await asyncio.sleep(0.02)
+            route = await quote(5)
+            with pytest.raises(DeadlineExceeded):
+                await leader
+            assert route["success"]
+            assert api.requests["route"] == 2
+
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+import random
+
+import pytest
+
+pytest.importorskip("eth_tester")
+
+from web3 import Web3
+
+from fibrous_python import AllowanceCache, FibrousRouter
+from fibrous_python.mock_server import make_scroll_transaction
+
+# Stand-in for Multicall3.aggregate3: calls every (target, allowFailure,
+# callData) in turn and returns (success, returnData) per call, reverting
+# when a call fails without allowFailure
+MULTICALL_CODE = bytes.fromhex(
+    "6004356004018035806180205260205260200161804052602060005261802051602002604001618060526000618000"
+    "525b618020516180005114610112576180405180618000516020020135016180805261808051604001356180805101"
+    "80356180c0526020016180c051906180605160600137600060006180c05161806051606001600061808051355af161"
+    "80a0526180a0516180805160200135176100a65760006000fd5b3d6000618060516060013e6000618060516060013d"
+    "01526040618060510361800051602002604001526180a0516180605152604061806051602001523d61806051604001"
+    "523d601f01602090046020026180605160600101618060526180005160010161800052610030565b618060516000f3")
+
+# reverts every call
+REVERT_CODE = bytes.fromhex("60006000fd")
+
+
+@pytest.fixture
+def eth_calls(w3):
+    # number of eth_call requests made so far
+    calls = [0]
+    call = w3.eth.call
+
+    def counting(*args, **kwargs):
+        calls[0] += 1
+        return call(*args, **kwargs)
+
+    w3.eth.call = counting
+    return calls
+
+
+def deploy(w3, code):
+    # creation code returning `code` as the runtime code
+    init = bytes.fromhex(f"61{len(code):04x}80600c6000396000f3") + code
+    return w3.eth.wait_for_transaction_receipt(w3.eth.send_transaction({"data": init}))["contractAddress"]
+
+
+def chain_allowance(w3, token):
+    from fibrous_python.models import erc20ABI
+
+    contract = w3.eth.contract(address=Web3.to_checksum_address(token), abi=erc20ABI)
+    return contract.functions.allowance(w3.eth.default_account, FibrousRouter.SCROLL_ROUTER_ADDRESS).call()
+
+
+def test_allowance_cache_is_invalidated_by_swaps(w3, token, eth_calls):
+    router = FibrousRouter(allowance_cache=AllowanceCache())
+    owner = w3.eth.default_account
+
+    assert router.build_approve_evm(100, token, w3, "scroll")
+    assert chain_allowance(w3, token) == 100
+    calls = eth_calls[0]
+    assert router.build_approve_evm(100, token, w3, "scroll")
+    assert eth_calls[0] == calls
+
+    pipeline = router.swap_pipeline(w3, "scroll", gas=300_000)
+    swap = make_scroll_transaction(random.Random(0), token, "0x" + "22" * 20, 100, owner)
+    pipeline.submit_swap(swap)
+    assert [submitted.receipt["status"] for submitted in pipeline.wait(timeout=5, poll_interval=0.01)] == [1]
+    assert chain_allowance(w3, token) == 0
+    assert router.allowances.get(owner, token, router.SCROLL_ROUTER_ADDRESS) is None
+
+    calls = eth_calls[0]
+    assert router.build_approve_evm(100, token, w3, "scroll")
+    assert eth_calls[0] > calls
+    assert chain_allowance(w3, token) == 100
+
+
+def test_unconfirmed_approvals_are_not_cached(w3, token):
+    router = FibrousRouter(allowance_cache=AllowanceCache())
+    assert router.build_approve_evm(100, token, w3, "scroll", wait_for_receipt=False)
+    assert router.allowances.get(w3.eth.default_account, token, router.SCROLL_ROUTER_ADDRESS) is None
+
+
+def test_allowances_are_read_from_chain_without_cache(w3, token, eth_calls):
+    router = FibrousRouter()
+    assert router.allowances is None
+    assert router.build_approve_evm(100, token, w3, "scroll")
+    calls = eth_calls[0]
+    assert router.build_approve_evm(100, token, w3, "scroll")
+    assert eth_calls[0] == calls + 1
+
+
+def test_allowances_are_read_in_one_multicall(w3, token, eth_calls):
+    multicall = deploy(w3, MULTICALL_CODE)
+    other = deploy(w3, bytes(w3.eth.get_code(token)))
+    reverting = deploy(w3, REVERT_CODE)
+    router = FibrousRouter(allowance_cache=AllowanceCache())
+    owner = w3.eth.default_account
+    assert router.build_approve_evm(100, token, w3, "scroll")
+    assert router.build_approve_evm(7, other, w3, "scroll")
+    router.allowances.invalidate()
+
+    calls = eth_calls[0]
+    allowances = router.get_allowances(w3, [token, other, reverting], "scroll", multicall_address=multicall)
+    assert allowances == {token: 100, other: 7, reverting: None}
+    assert eth_calls[0] == calls + 1
+    assert router.allowances.get(owner, token, router.SCROLL_ROUTER_ADDRESS) == 100
+    assert router.allowances.get(owner, other, router.SCROLL_ROUTER_ADDRESS) == 7
+    # failed reads are not cached
+    assert router.allowances.get(owner, reverting, router.SCROLL_ROUTER_ADDRESS) is None
+
+    calls = eth_calls[0]
+    assert router.build_approve_evm(7, other, w3, "scroll")
+    assert eth_calls[0] == calls
+    assert router.get_allowances(w3, [], "scroll", multicall_address=multicall) == {}
+
+def test_allowance_cache_entries_expire():
+    now = [0.0]
+    cache = AllowanceCache(ttl=10, clock=lambda: now[0])
+    cache.set("0xA", "0xB", "0xC", 5)
+    assert cache.get("0xa", "0xb", "0xc") == 5
+    now[0] = 11
+    assert cache.get("0xa", "0xb", "0xc") is None
+
+
+@pytest.fixture
+def rpc_calls(w3):
+    # {method: requests} of everything sent to the node
+    from web3.middleware import Web3Middleware
+
+    calls = {}
+
+    class Counting(Web3Middleware):
+        def request_processor(self, method, params):
+            calls[method] = calls.get(method, 0) + 1
+            return method, params
+
+    w3.middleware_onion.add(Counting)
+    return calls
+
+
+@pytest.fixture
+def signer(w3):
+    account = w3.eth.account.create()
+    w3.eth.wait_for_transaction_receipt(w3.eth.send_transaction({"to": account.address, "value": 10 ** 21}))
+    return account
+
+
+def test_pipeline_hands_out_nonces_locally(w3, token, signer, rpc_calls):
+    router = FibrousRouter()
+    pipeline = router.swap_pipeline(w3, "scroll", signer=signer, gas=300_000)
+    rng = random.Random(0)
+    swaps = [make_scroll_transaction(rng, token, "0x" + "22" * 20, 100, signer.address)
+             for _ in range(3)]
+    rpc_calls.clear()
+    submitted = pipeline.submit_swaps(swaps)
+    assert [s.nonce for s in submitted] == [0, 1, 2]
+    assert rpc_calls["eth_getTransactionCount"] == 1
+    # fees are read once per swap
+    assert rpc_calls["eth_getBlockByNumber"] == 3
+    assert rpc_calls["eth_maxPriorityFeePerGas"] == 3
+
+    mined = pipeline.wait(timeout=5, poll_interval=0.01)
+    assert [(m.nonce, m.receipt["status"]) for m in mined] == [(0, 1), (1, 1), (2, 1)]
+
+
+def test_pipeline_resyncs_nonces_sent_by_other_means(w3, signer):
+    router = FibrousRouter()
+    pipeline = router.swap_pipeline(w3, "scroll", signer=signer)
+    assert pipeline.submit_transaction({"to": signer.address, "value": 0, "gas": 21000}).nonce == 0
+    pipeline.wait(timeout=5, poll_interval=0.01)
+
+    # nonce 1 is used behind the pipeline's back
+    other = signer.sign_transaction({"to": signer.address, "value": 0, "gas": 21000, "nonce": 1,
+                                     "gasPrice": w3.eth.gas_price, "chainId": w3.eth.chain_id})
+    w3.eth.send_raw_transaction(other.raw_transaction)
+
+    submitted = pipeline.submit_transaction({"to": signer.address, "value": 0, "gas": 21000})
+    assert submitted.nonce == 2
+    assert [m.receipt["status"] for m in pipeline.wait(timeout=5, poll_interval=0.01)] == [1]
+    assert pipeline.nonces.gaps == []
@@ -0,0 +1,35 @@
+from fibrous_python.utils import TokenIndex
+
+
+def make_tokens():
+    return [
+        {"symbol": "ETH", "address": "0x049d36570d4e46f48e99674bd3fcc84644ddd6b96f7c741b1562b82f9e004dc7"},
+        {"symbol": "USDC", "address": "0x53C91253BC9682C04929CA02ED00B3E423F6710D2EE7E0D5EBB06F3ECF368A8"},
+        {"symbol": "BAD", "address": "not an address"},
+        {"symbol": "NONE", "address": None},
+    ]
+
+
+def test_lookups_by_normalized_address_and_symbol():
+    index = TokenIndex.from_tokens("starknet", make_tokens())
+    eth = index.by_address("0x49D36570D4E46F48E99674BD3FCC84644DDD6B96F7C741B1562B82F9E004DC7", "starknet")
+    assert eth["symbol"] == "ETH"
+    assert index.by_symbol("usdc", "starknet")[0]["symbol"] == "USDC"
+    assert index.by_symbol("usdc") == index.by_symbol("USDC", "starknet")
+    assert index.by_address("0x1", "starknet") is None
+
+
+def test_malformed_addresses_are_not_indexed_by_address():
+    index = TokenIndex.from_tokens("starknet", make_tokens())
+    assert len(index) == 4
+    assert index.by_symbol("bad", "starknet")[0]["address"] == "not an address"
+    assert set(index.symbol_map("starknet")) == {"eth", "usdc", "bad", "none"}
+
+
+def test_symbol_map_returns_copies():
+    index = TokenIndex.from_tokens("starknet", make_tokens())
+    tokens = index.symbol_map("starknet")
+    tokens.pop("eth")
+    tokens["usdc"]["symbol"] = "changed"
+    assert index.symbol_map("starknet")["eth"]["symbol"] == "ETH"
+    assert index.symbol_map("starknet")["usdc"]["symbol"] == "USDC"